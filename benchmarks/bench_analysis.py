@@ -0,0 +1,62 @@
+"""Times dparse.analysis.match against calling SpecifierSet.contains for
+every (dependency, row) pair of the same package.
+
+Run with ``python -m benchmarks.bench_analysis``.
+"""
+import random
+import timeit
+
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+
+from dparse.analysis import match
+from dparse.dependencies import Dependency
+
+
+def fixtures(packages, dependencies, rows):
+    rng = random.Random(0)
+    deps = [
+        Dependency(name="package-{}".format(rng.randrange(packages)),
+                   specs="=={}.{}.{}".format(rng.randrange(5),
+                                             rng.randrange(20),
+                                             rng.randrange(10)),
+                   line="")
+        for _ in range(dependencies)
+    ]
+    table = []
+    for _ in range(rows):
+        low = "{}.{}".format(rng.randrange(5), rng.randrange(20))
+        table.append(("package-{}".format(rng.randrange(packages)),
+                      ">={},<{}.{}".format(low, low, rng.randrange(1, 9))))
+    return deps, table
+
+
+def one_at_a_time(deps, table):
+    by_key = {}
+    for dep in deps:
+        by_key.setdefault(dep.key, []).append(dep)
+    matches = []
+    for index, (name, specifier) in enumerate(table):
+        specifier = SpecifierSet(specifier)
+        for dep in by_key.get(name, ()):
+            version = Version(dep.spec_string[2:])
+            if specifier.contains(version):
+                matches.append((index, dep))
+    return matches
+
+
+def main():
+    for packages, dependencies, rows in ((100, 1000, 1000),
+                                         (500, 20000, 5000)):
+        deps, table = fixtures(packages, dependencies, rows)
+        assert len(match(deps, table)) == len(one_at_a_time(deps, table))
+        print("{} packages, {} dependencies, {} rows".format(
+            packages, dependencies, rows))
+        for label, func in (("contains", one_at_a_time), ("match", match)):
+            seconds = min(timeit.repeat(lambda: func(deps, table),
+                                        number=1, repeat=3))
+            print("  {:<10} {:8.2f} ms".format(label, seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
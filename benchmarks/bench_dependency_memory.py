@@ -0,0 +1,36 @@
+"""Measures the memory held by Dependency objects.
+
+Run with ``python -m benchmarks.bench_dependency_memory``.
+"""
+import sys
+import tracemalloc
+
+from packaging.specifiers import SpecifierSet
+
+from dparse.dependencies import Dependency
+
+
+def instance_size(dep):
+    size = sys.getsizeof(dep)
+    if hasattr(dep, "__dict__"):
+        size += sys.getsizeof(dep.__dict__)
+    return size
+
+
+def main(count=100000):
+    names = ["package-{}".format(n) for n in range(count)]
+    specs = SpecifierSet("==1.0.0")
+
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    dependencies = [Dependency(name=name, specs=specs, line=name)
+                    for name in names]
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    print("per instance: {} bytes".format(instance_size(dependencies[0])))
+    print("{} dependencies: {:.1f} MiB traced".format(count, used / 2 ** 20))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Times PipfileLockParser on a generated 500-package Pipfile.lock.
+
+Run with ``python -m benchmarks.bench_pipfile_lock``.
+"""
+import json
+import timeit
+from collections import OrderedDict
+
+from dparse import parse, filetypes, parser
+
+from .fixtures import pipfile_lock
+
+
+def bench(label, **kwargs):
+    content = pipfile_lock(500)
+    seconds = min(timeit.repeat(
+        lambda: parse(content, file_type=filetypes.pipfile_lock, **kwargs),
+        number=20, repeat=5)) / 20
+    print("{:<30} {:8.2f} ms".format(label, seconds * 1000))
+
+
+def bench_load(label, loads):
+    content = pipfile_lock(500)
+    seconds = min(timeit.repeat(
+        lambda: loads(content), number=20, repeat=5)) / 20
+    print("{:<30} {:8.2f} ms".format(label, seconds * 1000))
+
+
+def main():
+    bench_load("load, OrderedDict", lambda c: json.loads(
+        c, object_pairs_hook=OrderedDict))
+    bench_load("load, dict", json.loads)
+    bench_load("load, load_json", parser.load_json)
+    bench("default")
+    bench("without hashes", parser=parser.FastPipfileLockParser)
+    if parser._json_loads is not json.loads:
+        parser._json_loads = json.loads
+        bench("default, stdlib json")
+        bench("without hashes, stdlib json",
+              parser=parser.FastPipfileLockParser)
+
+
+if __name__ == "__main__":
+    main()
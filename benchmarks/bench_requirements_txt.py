@@ -0,0 +1,23 @@
+"""Times RequirementsTXTParser on generated, hash-pinned requirement files.
+
+Run with ``python -m benchmarks.bench_requirements_txt``.
+"""
+import timeit
+
+from dparse import parse, filetypes
+
+from .fixtures import requirements_txt
+
+
+def main():
+    for count in (100, 1000, 5000):
+        content = requirements_txt(count)
+        number = max(1, 5000 // count)
+        seconds = min(timeit.repeat(
+            lambda: parse(content, file_type=filetypes.requirements_txt),
+            number=number, repeat=5)) / number
+        print("{:>6} requirements: {:8.2f} ms".format(count, seconds * 1000))
+
+
+if __name__ == "__main__":
+    main()
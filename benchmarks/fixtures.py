@@ -0,0 +1,118 @@
+"""Generated dependency files of a given size, one generator per file type.
+
+Every generator is deterministic, so results can be compared across commits.
+"""
+import json
+
+
+def requirements_txt(count, hashes_per_requirement=2):
+    """
+    Hash-pinned requirements with continuations, comments, extras,
+    environment markers and index options, as written by pip-compile.
+    """
+    lines = [
+        "#",
+        "# This file is autogenerated by pip-compile",
+        "#",
+        "--index-url https://pypi.org/simple",
+        "--extra-index-url https://some.foo/simple",
+        "",
+    ]
+    for n in range(count):
+        requirement = "package-{n}==1.{n}.0".format(n=n)
+        if n % 7 == 0:
+            requirement = "package-{n}[extra]==1.{n}.0".format(n=n)
+        if n % 5 == 0:
+            requirement += " ; python_version >= '3.7'"
+        lines.append(requirement + " \\")
+        for h in range(hashes_per_requirement):
+            lines.append("    --hash=sha256:{:064x}{}".format(
+                n + h, " \\" if h < hashes_per_requirement - 1 else ""))
+        lines.append("    # via -r requirements.in")
+    return "\n".join(lines) + "\n"
+
+
+def tox_ini(count):
+    deps = "\n".join("    package-{n}==1.{n}.0".format(n=n)
+                     for n in range(count))
+    return "[tox]\nenvlist = py311\n\n" \
+           "[testenv]\ncommands = pytest\ndeps =\n" + deps + "\n"
+
+
+def conda_yml(count):
+    pip = "\n".join("    - package-{n}==1.{n}.0".format(n=n)
+                    for n in range(count))
+    return "name: env\ndependencies:\n  - python=3.11\n  - pip:\n" + \
+        pip + "\n"
+
+
+def pipfile(count):
+    def section(start, stop):
+        return "\n".join('package-{n} = "==1.{n}.0"'.format(n=n)
+                         for n in range(start, stop))
+
+    return '[[source]]\nurl = "https://pypi.org/simple"\n' \
+           'verify_ssl = true\nname = "pypi"\n\n' \
+           "[packages]\n" + section(0, count // 2 + count % 2) + "\n\n" \
+           "[dev-packages]\n" + section(count // 2 + count % 2, count) + \
+           "\n"
+
+
+def pipfile_lock(count, hashes_per_package=10):
+    def section(start, stop):
+        return {
+            "package-{}".format(n): {
+                "hashes": [
+                    "sha256:{:064x}".format(n * hashes_per_package + h)
+                    for h in range(hashes_per_package)
+                ],
+                "index": "pypi",
+                "markers": "python_version >= '3.7'",
+                "version": "==1.{}.0".format(n),
+            }
+            for n in range(start, stop)
+        }
+
+    half = count // 2 + count % 2
+    return json.dumps({
+        "_meta": {"hash": {"sha256": "0" * 64}, "pipfile-spec": 6,
+                  "requires": {}, "sources": []},
+        "default": section(0, half),
+        "develop": section(half, count),
+    }, indent=4) + "\n"
+
+
+def setup_cfg(count):
+    half = count // 2 + count % 2
+    install = "\n".join("    package-{n}==1.{n}.0".format(n=n)
+                        for n in range(half))
+    extras = "\n".join("    package-{n}==1.{n}.0".format(n=n)
+                       for n in range(half, count))
+    return "[metadata]\nname = project\n\n" \
+           "[options]\ninstall_requires =\n" + install + "\n\n" \
+           "[options.extras_require]\ntest =\n" + extras + "\n"
+
+
+def poetry_lock(count):
+    packages = []
+    for n in range(count):
+        packages.append(
+            '[[package]]\nname = "package-{n}"\nversion = "1.{n}.0"\n'
+            'description = ""\noptional = false\n'
+            'python-versions = ">=3.7"\n\n'
+            '[[package.files]]\nfile = "package_{n}-1.{n}.0.tar.gz"\n'
+            'hash = "sha256:{h:064x}"\n'.format(n=n, h=n))
+    return "\n".join(packages) + \
+        '\n[metadata]\nlock-version = "2.0"\npython-versions = "^3.7"\n' \
+        'content-hash = "{}"\n'.format("0" * 64)
+
+
+def pyproject_toml(count):
+    half = count // 2 + count % 2
+    dependencies = ",\n".join('    "package-{n}>=1.{n}.0"'.format(n=n)
+                              for n in range(half))
+    extras = ", ".join('"package-{n}>=1.{n}.0"'.format(n=n)
+                       for n in range(half, count))
+    return '[project]\nname = "project"\nversion = "1.0"\n' \
+           "dependencies = [\n" + dependencies + "\n]\n\n" \
+           "[project.optional-dependencies]\ntest = [" + extras + "]\n"
@@ -0,0 +1,287 @@
+"""A reproducible benchmark suite for every parser and updater.
+
+Run with ``python -m benchmarks``, see ``python -m benchmarks --help``.
+Results can be saved as JSON and compared against an earlier run::
+
+    python -m benchmarks --json base.json
+    git checkout my-branch
+    python -m benchmarks --json new.json --compare base.json
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import timeit
+from collections import namedtuple
+
+from dparse import __version__, filetypes, parse, updater
+from dparse.parser import Parser, RequirementsTXTLineParser
+
+from . import fixtures
+
+SIZES = (10, 100, 1000)
+
+Benchmark = namedtuple("Benchmark", ["name", "setup"])
+
+PARSE_CASES = (
+    (filetypes.requirements_txt, fixtures.requirements_txt),
+    (filetypes.tox_ini, fixtures.tox_ini),
+    (filetypes.conda_yml, fixtures.conda_yml),
+    (filetypes.pipfile, fixtures.pipfile),
+    (filetypes.pipfile_lock, fixtures.pipfile_lock),
+    (filetypes.setup_cfg, fixtures.setup_cfg),
+    (filetypes.poetry_lock, fixtures.poetry_lock),
+    (filetypes.pyproject_toml, fixtures.pyproject_toml),
+)
+
+UPDATE_CASES = (
+    (updater.RequirementsTXTUpdater, filetypes.requirements_txt,
+     fixtures.requirements_txt),
+    (updater.ToxINIUpdater, filetypes.tox_ini, fixtures.tox_ini),
+    (updater.CondaYMLUpdater, filetypes.conda_yml, fixtures.conda_yml),
+    (updater.SetupCFGUpdater, filetypes.setup_cfg, fixtures.setup_cfg),
+    (updater.PipfileUpdater, filetypes.pipfile, fixtures.pipfile),
+    (updater.PipfileLockUpdater, filetypes.pipfile_lock,
+     fixtures.pipfile_lock),
+)
+
+HASHES = [{"method": "sha256", "hash": "{:064x}".format(n)} for n in (1, 2)]
+
+
+def parse_benchmark(file_type, fixture, size):
+    def setup():
+        content = fixture(size)
+        return lambda: parse(content, file_type=file_type)
+    return Benchmark("parse/{}/{}".format(file_type, size), setup)
+
+
+def cold_parse_benchmark(file_type, fixture, size):
+    """
+    Requirement strings repeat between rounds, so this one clears the
+    requirement string cache before every parse.
+    """
+    def setup():
+        content = fixture(size)
+
+        def func():
+            RequirementsTXTLineParser.cache_clear()
+            parse(content, file_type=file_type)
+        return func
+    return Benchmark("parse-cold/{}/{}".format(file_type, size), setup)
+
+
+def hash_benchmarks(size, hashes_per_requirement=30):
+    """
+    Requirement files locking packages with many wheels, and the hash
+    extraction on its own, on one line with size hashes.
+    """
+    def parse_setup():
+        content = fixtures.requirements_txt(size, hashes_per_requirement)
+        return lambda: parse(content, file_type=filetypes.requirements_txt)
+
+    def hashes_setup():
+        line = "package==1.0.0 " + " ".join(
+            "--hash=sha256:{:064x}".format(n) for n in range(size))
+        return lambda: Parser.parse_hashes(line)
+
+    return [
+        Benchmark("parse-hashes/{}/{}".format(
+            filetypes.requirements_txt, size), parse_setup),
+        Benchmark("parse_hashes/{}".format(size), hashes_setup),
+    ]
+
+
+def json_benchmarks(size, hashes_per_requirement=2):
+    """
+    DependencyFile.json() against write_json() into a StringIO, for a
+    requirements file with hashes, and parsing a Pipfile.lock into JSON.
+    """
+    def dependency_file():
+        content = fixtures.requirements_txt(size, hashes_per_requirement)
+        return parse(content, file_type=filetypes.requirements_txt)
+
+    def json_setup():
+        return dependency_file().json
+
+    def write_json_setup():
+        dep_file = dependency_file()
+        return lambda: dep_file.write_json(io.StringIO())
+
+    def parse_json_setup():
+        # a lock file keeps its specifiers as str, json() of a fresh parse
+        # shows whether they are turned into SpecifierSets on the way
+        content = fixtures.pipfile_lock(size)
+        return lambda: parse(content, file_type=filetypes.pipfile_lock).json()
+
+    name = "{}/{}/{}".format("{}", filetypes.requirements_txt, size)
+    return [Benchmark(name.format("json"), json_setup),
+            Benchmark(name.format("write-json"), write_json_setup),
+            Benchmark("parse-json/{}/{}".format(filetypes.pipfile_lock, size),
+                      parse_json_setup)]
+
+
+def update_benchmark(updater_class, file_type, fixture, size):
+    def setup():
+        content = fixture(size)
+        dependencies = parse(content, file_type=file_type).dependencies
+        # update a dependency in the middle of the file
+        dependency = dependencies[len(dependencies) // 2]
+        return lambda: updater_class.update(
+            content, dependency, "9.9.9", hashes=HASHES)
+    return Benchmark(
+        "update/{}/{}".format(updater_class.__name__, size), setup)
+
+
+def update_many_benchmarks(updater_class, file_type, fixture, size,
+                           count=80):
+    """
+    Bumping up to count dependencies in one file, once with update_many and
+    once with repeated update calls.
+    """
+    def updates():
+        content = fixture(size)
+        dependencies = parse(content, file_type=file_type).dependencies
+        return content, [(dependency, "9.9.9", "==", HASHES)
+                         for dependency in dependencies[:count]]
+
+    def many():
+        content, bumps = updates()
+        return lambda: updater_class.update_many(content, bumps)
+
+    def repeated():
+        content, bumps = updates()
+
+        def func():
+            new_content = content
+            for bump in bumps:
+                new_content = updater_class.update(new_content, *bump)
+        return func
+
+    name = "{}/{}/{}".format("{}", updater_class.__name__, size)
+    return [Benchmark(name.format("update-many"), many),
+            Benchmark(name.format("update-repeated"), repeated)]
+
+
+def collect(sizes=SIZES):
+    """
+    :param sizes: number of dependencies in the generated files
+    :return: list of Benchmark
+    """
+    benchmarks = []
+    for size in sizes:
+        for file_type, fixture in PARSE_CASES:
+            benchmarks.append(parse_benchmark(file_type, fixture, size))
+        benchmarks.append(cold_parse_benchmark(
+            filetypes.requirements_txt, fixtures.requirements_txt, size))
+        benchmarks.extend(hash_benchmarks(size))
+        benchmarks.extend(json_benchmarks(size))
+        for updater_class, file_type, fixture in UPDATE_CASES:
+            benchmarks.append(
+                update_benchmark(updater_class, file_type, fixture, size))
+            benchmarks.extend(update_many_benchmarks(
+                updater_class, file_type, fixture, size))
+    return benchmarks
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """
+    Times func with timeit, calling it often enough per round to run for
+    at least min_time seconds.
+
+    :return: dict with the per-call min and mean in seconds
+    """
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {
+        "min": min(times),
+        "mean": sum(times) / len(times),
+        "number": number,
+        "repeat": repeat,
+    }
+
+
+def run(benchmarks, repeat=5, min_time=0.2, out=sys.stdout):
+    """
+    Runs the benchmarks, skipping the ones whose optional dependency
+    (pyyaml for conda files) is not installed.
+
+    :return: dict of results by benchmark name
+    """
+    results = {}
+    for benchmark in benchmarks:
+        try:
+            func = benchmark.setup()
+            func()
+        except ImportError as e:
+            out.write("{:<45} skipped ({})\n".format(benchmark.name, e))
+            continue
+        results[benchmark.name] = measure(func, repeat, min_time)
+        out.write("{:<45} {:10.3f} ms\n".format(
+            benchmark.name, results[benchmark.name]["min"] * 1000))
+    return results
+
+
+def machine_info():
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "dparse": __version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline, out=sys.stdout):
+    """
+    Prints the ratio of every result to the same benchmark in baseline,
+    below 1.0 is faster.
+    """
+    out.write("\n{:<45} {:>10} {:>10} {:>7}\n".format(
+        "benchmark", "base ms", "new ms", "ratio"))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base, new = baseline[name]["min"], result["min"]
+        out.write("{:<45} {:10.3f} {:10.3f} {:7.2f}\n".format(
+            name, base * 1000, new * 1000, new / base))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("-k", "--filter", default=None,
+                        help="only run benchmarks matching this regex")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="seconds per round")
+    parser.add_argument("--json", dest="json_path",
+                        help="save the results to this file")
+    parser.add_argument("--compare", dest="baseline_path",
+                        help="compare against results saved with --json")
+    args = parser.parse_args(argv)
+
+    benchmarks = collect(args.sizes)
+    if args.filter:
+        benchmarks = [b for b in benchmarks if re.search(args.filter, b.name)]
+
+    results = run(benchmarks, repeat=args.repeat, min_time=args.min_time)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"machine": machine_info(), "results": results}, f,
+                      indent=2, sort_keys=True)
+    if args.baseline_path:
+        with open(args.baseline_path) as f:
+            compare(results, json.load(f)["results"])
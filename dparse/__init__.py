@@ -4,4 +4,15 @@ __author__ = """Jannis Gebauer"""
 __email__ = 'support@pyup.io'
 __version__ = '0.6.3'
 
-from .parser import parse  # noqa
+from .parser import parse, parse_many, parse_path, parse_bytes  # noqa
+from .scan import scan_tree  # noqa
+
+
+def __getattr__(name):
+    # the asyncio entry points are imported on first use, importing
+    # asyncio costs more than importing dparse itself
+    if name in ("aparse", "aparse_path", "aparse_many"):
+        from . import aio
+        return getattr(aio, name)
+    raise AttributeError(
+        "module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,132 @@
+"""asyncio entry points, running the parsers off the event loop."""
+
+import asyncio
+import os
+from functools import partial
+
+from .parser import parse, parse_path, ParseResult
+
+
+async def aparse(content, file_type=None, path=None, executor=None,
+                 **kwargs):
+    """
+    Parses content on an executor, -r includes are read there as well so
+    the event loop is never blocked.
+
+    Cancelling the call cancels the parse if it has not started yet, a
+    parse that is already running finishes in the background and its
+    result is dropped.
+
+    :param content:
+    :param file_type:
+    :param path:
+    :param executor: concurrent.futures.Executor, defaults to the loop's
+                     default executor
+    :param kwargs: passed to parse()
+    :return: DependencyFile
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(
+        parse, content, file_type=file_type, path=path, **kwargs))
+
+
+async def aparse_path(path, file_type=None, executor=None, **kwargs):
+    """
+    Reads and parses the file at path on an executor.
+
+    :param path: str or os.PathLike
+    :param file_type:
+    :param executor: concurrent.futures.Executor, defaults to the loop's
+                     default executor
+    :param kwargs: passed to parse()
+    :return: DependencyFile
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(
+        parse_path, path, file_type=file_type, **kwargs))
+
+
+async def _parse_one(index, content, path, file_type, executor, kwargs):
+    try:
+        dep_file = await aparse(content, file_type=file_type, path=path,
+                                executor=executor, **kwargs)
+    except Exception as e:
+        return ParseResult(index, path, None, e)
+    return ParseResult(index, path, dep_file, None)
+
+
+async def _aenumerate(files):
+    index = 0
+    if hasattr(files, "__aiter__"):
+        async for item in files:
+            yield index, item
+            index += 1
+    else:
+        for item in files:
+            yield index, item
+            index += 1
+
+
+async def aparse_many(files, executor=None, limit=None, ordered=False,
+                      **kwargs):
+    """
+    Parses many files on an executor, yielding a ParseResult as each file
+    is done. Malformed and unknown files, and any other error raised for
+    a file, are reported through ParseResult.error instead of aborting the
+    batch.
+
+    At most limit files are parsed at once and only as many are taken from
+    files, so huge and asynchronous inputs are not materialized. Closing
+    the generator, or cancelling the task iterating it, cancels the
+    parses that have not started yet.
+
+    :param files: iterable or async iterable of (content, path, file_type)
+                  tuples
+    :param executor: concurrent.futures.Executor, defaults to the loop's
+                     default executor
+    :param limit: maximum number of parses running at once, defaults to
+                  the number of CPUs
+    :param ordered: yield results in input order
+    :param kwargs: passed to parse()
+    :return: async generator of ParseResult
+    """
+    limit = limit or os.cpu_count() or 1
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+
+    items = _aenumerate(files)
+    exhausted = False
+    pending = []
+
+    async def fill():
+        nonlocal exhausted
+        while not exhausted and len(pending) < limit:
+            try:
+                index, (content, path, file_type) = await items.__anext__()
+            except StopAsyncIteration:
+                exhausted = True
+                return
+            pending.append(asyncio.ensure_future(_parse_one(
+                index, content, path, file_type, executor, kwargs)))
+
+    try:
+        await fill()
+        while pending:
+            if ordered:
+                done = [pending.pop(0)]
+                await done[0]
+            else:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED)
+                done = sorted(done, key=pending.index)
+                for task in done:
+                    pending.remove(task)
+            await fill()
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        await items.aclose()
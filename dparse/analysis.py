@@ -0,0 +1,227 @@
+"""
+Matching the pinned versions of many dependencies against version ranges,
+e.g. the vulnerable ranges of an advisory database, in bulk.
+
+Dependencies are grouped by key and every distinct version is parsed once.
+The versions of a key are sorted and every clause of a specifier is turned
+into ranges of that sorted list with binary searches, so a specifier costs a
+few comparisons per clause rather than a SpecifierSet.contains call per
+dependency.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+Match = namedtuple(
+    "Match", ["index", "key", "specifier", "dependency", "version"]
+)
+Match.__doc__ = """
+A dependency whose pinned version is in the range of a row.
+
+:param index: index of the row in the table that was matched against
+:param key: the normalized package key
+:param specifier: the row's SpecifierSet
+:param dependency: the matching Dependency
+:param version: its pinned Version
+"""
+
+
+def normalize_key(name):
+    """
+    Normalizes a package name the way Dependency.key is.
+
+    :param name: str
+    :return: str
+    """
+    return name.lower().replace("_", "-")
+
+
+def pinned_version(dependency):
+    """
+    Returns the version string a dependency is pinned to with ==, or None
+    if it is not pinned to a single version.
+
+    :param dependency: Dependency
+    :return: str or None
+    """
+    spec = dependency.spec_string.strip()
+    if not spec.startswith("==") or spec.startswith("===") or "," in spec:
+        return None
+    version = spec[2:].strip()
+    if not version or version.endswith(".*"):
+        return None
+    return version
+
+
+def _first(versions, predicate, lo=0):
+    # first index from lo on where predicate, which has to be False then
+    # True along versions, holds
+    hi = len(versions)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if predicate(versions[mid]):
+            hi = mid
+        else:
+            lo = mid + 1
+    return lo
+
+
+def _contains(operator, version):
+    from packaging.specifiers import Specifier
+
+    specifier = Specifier(operator + version)
+    return lambda v: specifier.contains(v, prereleases=True)
+
+
+def _equal_range(version, versions):
+    from packaging.version import Version
+
+    if version.endswith(".*"):
+        # everything from the first dev release of the prefix up to the
+        # first dev release of the next one
+        prefix = Version(version[:-2])
+        release = prefix.release
+        upper = release[:-1] + (release[-1] + 1,)
+        return (
+            bisect_left(versions, Version("{}!{}.dev0".format(
+                prefix.epoch, ".".join(map(str, release))))),
+            bisect_left(versions, Version("{}!{}.dev0".format(
+                prefix.epoch, ".".join(map(str, upper))))),
+        )
+    target = Version(version)
+    if target.local is not None:
+        return bisect_left(versions, target), bisect_right(versions, target)
+    # without a local label, == compares public versions, as >= and <= do
+    lo = _first(versions, _contains(">=", version))
+    at_most = _contains("<=", version)
+    hi = _first(versions, lambda v: not at_most(v), lo)
+    return lo, hi
+
+
+def _clause_ranges(specifier, versions):
+    """
+    The (start, stop) ranges of versions, sorted, that specifier contains
+    when pre-releases are allowed.
+    """
+    from packaging.version import Version
+
+    operator, version = specifier.operator, specifier.version
+    count = len(versions)
+    if operator in ("==", "!="):
+        lo, hi = _equal_range(version, versions)
+        return [(lo, hi)] if operator == "==" else [(0, lo), (hi, count)]
+    if operator in (">", ">="):
+        return [(_first(versions, lambda v: specifier.contains(
+            v, prereleases=True)), count)]
+    if operator in ("<", "<="):
+        return [(0, _first(versions, lambda v: not specifier.contains(
+            v, prereleases=True)))]
+    if operator == "~=":
+        # >= the version and == its release without the last part, .*
+        lo = _first(versions, _contains(">=", version))
+        target = Version(version)
+        prefix = "{}!{}.*".format(
+            target.epoch, ".".join(map(str, target.release[:-1])))
+        start, stop = _equal_range(prefix, versions)
+        return [(max(lo, start), stop)]
+    # === compares strings, there is no order to search
+    ranges = []
+    for index, candidate in enumerate(versions):
+        if specifier.contains(candidate, prereleases=True):
+            ranges.append((index, index + 1))
+    return ranges
+
+
+def _intersect(ranges, other):
+    result = []
+    for start, stop in ranges:
+        for other_start, other_stop in other:
+            lo, hi = max(start, other_start), min(stop, other_stop)
+            if lo < hi:
+                result.append((lo, hi))
+    return result
+
+
+def matching_indexes(specifier_set, versions, prereleases=None):
+    """
+    Returns the indexes of the versions, a sorted list of Version, that
+    specifier_set contains, as SpecifierSet.contains would decide.
+
+    :param specifier_set: SpecifierSet
+    :param versions: sorted list of Version
+    :param prereleases: allow pre-releases, by default the installed
+                        packaging decides
+    :return: list of int
+    """
+    ranges = [(0, len(versions))]
+    for specifier in specifier_set:
+        ranges = _intersect(ranges, _clause_ranges(specifier, versions))
+        if not ranges:
+            return []
+    indexes = []
+    for start, stop in ranges:
+        for index in range(start, stop):
+            version = versions[index]
+            if not version.is_prerelease or prereleases:
+                indexes.append(index)
+            elif prereleases is None and specifier_set.contains(version):
+                # left to packaging, whose rules for pre-releases changed
+                # between releases
+                indexes.append(index)
+    return indexes
+
+
+def match(dependencies, table, prereleases=None):
+    """
+    Matches the pinned versions of dependencies against a table of
+    (package name, specifier) rows. Dependencies that are not pinned with
+    == to a valid version are left out.
+
+    :param dependencies: iterable of Dependency
+    :param table: iterable of (name, specifier) rows, the specifier a str
+                  or a SpecifierSet; extra columns are ignored
+    :param prereleases: allow pre-releases, by default the installed
+                        packaging decides as SpecifierSet.contains does
+    :return: list of Match, by row and then by version
+    """
+    from packaging.specifiers import SpecifierSet
+    from packaging.version import Version, InvalidVersion
+
+    # key -> version str -> dependencies pinned to it
+    pins = {}
+    for dependency in dependencies:
+        version = pinned_version(dependency)
+        if version is not None:
+            pins.setdefault(dependency.key, {}).setdefault(
+                version, []).append(dependency)
+
+    # key -> (sorted Version list, dependencies of each Version)
+    groups = {}
+    parsed = {}
+    matches = []
+    for index, row in enumerate(table):
+        name, specifier_set = row[0], row[1]
+        key = normalize_key(name)
+        if key not in pins:
+            continue
+        if key not in groups:
+            by_version = {}
+            for version, pinned in pins[key].items():
+                if version not in parsed:
+                    try:
+                        parsed[version] = Version(version)
+                    except InvalidVersion:
+                        parsed[version] = None
+                if parsed[version] is not None:
+                    # 1.0 and 1.0.0 are the same version
+                    by_version.setdefault(parsed[version], []).extend(pinned)
+            versions = sorted(by_version)
+            groups[key] = versions, [by_version[v] for v in versions]
+        versions, pinned = groups[key]
+        if not isinstance(specifier_set, SpecifierSet):
+            specifier_set = SpecifierSet(specifier_set)
+        for i in matching_indexes(specifier_set, versions, prereleases):
+            for dependency in pinned[i]:
+                matches.append(
+                    Match(index, key, specifier_set, dependency, versions[i]))
+    return matches
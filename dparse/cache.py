@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from .dependencies import Dependency, DparseJSONEncoder
+
+# bump whenever the cached representation changes
+CACHE_VERSION = 2
+
+
+class ParseCache:
+    """
+    Base class for parse caches. A cache maps a key built by `cache_key` to
+    the list of dependencies a parser found in a file.
+    """
+
+    def get(self, key):
+        """
+
+        :param key: str
+        :return: list of Dependency or None
+        """
+        raise NotImplementedError
+
+    def set(self, key, dependencies):
+        """
+
+        :param key: str
+        :param dependencies: list of Dependency
+        """
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class MemoryCache(ParseCache):
+    """
+    A thread-safe in-memory LRU cache. Hits return new lists holding the
+    same Dependency objects, so they should be treated as read-only.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+
+        :param maxsize: maximum number of files to keep
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return list(self._data[key])
+
+    def set(self, key, dependencies):
+        with self._lock:
+            self._data[key] = list(dependencies)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class DirectoryCache(ParseCache):
+    """
+    An on-disk cache storing one JSON document per parsed file. Entries are
+    written atomically, so a directory can be shared between processes.
+    """
+
+    def __init__(self, path):
+        """
+
+        :param path: directory to store the entries in, created if missing
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _entry_path(self, key):
+        return os.path.join(self.path, key[:2], key + ".json")
+
+    def get(self, key):
+        try:
+            with open(self._entry_path(key), encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return [_load_dependency(d) for d in data]
+
+    def set(self, key, dependencies):
+        entry_path = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path))
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump([dep.serialize() for dep in dependencies], f,
+                          cls=DparseJSONEncoder)
+            os.replace(tmp_path, entry_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    def clear(self):
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".json"):
+                    os.remove(os.path.join(root, name))
+
+
+def _load_dependency(d):
+    from packaging.specifiers import SpecifierSet
+
+    d["specs"] = SpecifierSet(d["specs"])
+    return Dependency.deserialize(d)
+
+
+def cache_key(dependency_file):
+    """
+    Builds the cache key of a DependencyFile from its sha (or a hash of its
+    content), the file type, the parser in use, the markers and the dparse
+    version. Files with includes are never cached, so the key doesn't
+    depend on the path.
+
+    :param dependency_file: DependencyFile
+    :return: str
+    """
+    from . import __version__
+
+    digest = dependency_file.sha
+    if digest is None:
+        digest = hashlib.sha256(
+            dependency_file.content.encode("utf-8")).hexdigest()
+    parser_class = type(dependency_file.parser)
+    parts = (
+        str(CACHE_VERSION), __version__, digest,
+        str(dependency_file.file_type),
+        parser_class.__module__ + "." + parser_class.__qualname__,
+        repr(dependency_file.marker),
+    )
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
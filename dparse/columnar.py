@@ -0,0 +1,334 @@
+"""
+A compact, columnar format for many parsed dependency files.
+
+The files and their dependencies are stored as columns (struct of arrays)
+rather than one nested document per file, every distinct string is stored
+once and the file contents are left out. With pyarrow installed the columns
+are written as a Parquet table, dictionary encoded; otherwise as msgpack
+when it is installed, or as JSON lines. load() reads all three back.
+"""
+
+import json
+
+from . import registry
+from .dependencies import Dependency, DependencyFile
+
+FORMAT_VERSION = 1
+
+PARQUET = "parquet"
+MSGPACK = "msgpack"
+JSONL = "jsonl"
+
+FILE_COLUMNS = ("path", "file_type", "sha")
+DEPENDENCY_COLUMNS = (
+    "file_id", "name", "key", "specs", "line", "source", "dependency_type",
+    "index_server", "section", "sections", "hashes", "extras", "meta",
+    "line_numbers", "offsets",
+)
+# columns holding lists of strings
+LIST_COLUMNS = ("sections", "hashes", "extras")
+# columns holding an int or a (first, last) pair of ints, all the others
+# hold one string or None
+INT_COLUMNS = ("file_id", "line_numbers", "offsets")
+
+PARQUET_MAGIC = b"PAR1"
+
+
+def to_columns(dependency_files):
+    """
+    Turns dependency files into a dict of file columns and a dict of
+    dependency columns. Equal strings are shared between rows.
+
+    :param dependency_files: iterable of DependencyFile
+    :return: dict with "files" and "dependencies" keys
+    """
+    interned = {}
+
+    def intern(value):
+        if value is None:
+            return None
+        return interned.setdefault(value, value)
+
+    def intern_list(values):
+        if values is None:
+            return None
+        return [intern(value) for value in values]
+
+    files = {column: [] for column in FILE_COLUMNS}
+    dependencies = {column: [] for column in DEPENDENCY_COLUMNS}
+    for file_id, dep_file in enumerate(dependency_files):
+        files["path"].append(intern(dep_file.path))
+        files["file_type"].append(intern(dep_file.file_type))
+        files["sha"].append(dep_file.sha)
+        for dep in dep_file.dependencies:
+            dependencies["file_id"].append(file_id)
+            dependencies["name"].append(intern(dep.name))
+            dependencies["key"].append(intern(dep.key))
+            dependencies["specs"].append(intern(dep.spec_string))
+            dependencies["line"].append(dep.line)
+            dependencies["source"].append(intern(dep.source))
+            dependencies["dependency_type"].append(
+                intern(dep.dependency_type))
+            dependencies["index_server"].append(intern(dep.index_server))
+            dependencies["section"].append(intern(dep.section))
+            dependencies["sections"].append(intern_list(dep.sections))
+            dependencies["hashes"].append(intern_list(dep.hashes))
+            # extras are created on first access, most dependencies have none
+            dependencies["extras"].append(intern_list(dep._extras or None))
+            # meta is rare and mostly the same few dicts, kept as JSON
+            dependencies["meta"].append(intern(
+                json.dumps(dep._meta, sort_keys=True) if dep._meta else None))
+            dependencies["line_numbers"].append(_pair(dep.line_numbers))
+            dependencies["offsets"].append(_pair(dep.offsets))
+    return {"files": files, "dependencies": dependencies}
+
+
+def _pair(value):
+    return None if value is None else list(value)
+
+
+def _tuple(value):
+    return None if value is None else tuple(value)
+
+
+def from_columns(columns):
+    """
+    Rebuilds the dependency files of to_columns(), without their content.
+
+    :param columns: dict with "files" and "dependencies" keys
+    :return: list of DependencyFile
+    """
+    from .parser import Parser
+
+    files = columns["files"]
+    dependency_files = []
+    for path, file_type, sha in zip(*(files[c] for c in FILE_COLUMNS)):
+        # files parsed with a parser of their own get the base parser
+        parser = None if registry.parser_for(file_type, path) else Parser
+        dependency_files.append(DependencyFile(
+            content=None, path=path, sha=sha, file_type=file_type,
+            parser=parser))
+
+    dependencies = columns["dependencies"]
+    for row in zip(*(dependencies[c] for c in DEPENDENCY_COLUMNS)):
+        (file_id, name, key, specs, line, source, dependency_type,
+         index_server, section, sections, hashes, extras, meta,
+         line_numbers, offsets) = row
+        dep = Dependency(
+            name=name, specs=specs, line=line, source=source,
+            index_server=index_server, dependency_type=dependency_type,
+            section=section, sections=sections,
+            hashes=hashes if hashes is not None else (),
+            extras=extras or None,
+            meta=json.loads(meta) if meta is not None else None,
+            line_numbers=_tuple(line_numbers), offsets=_tuple(offsets)
+        )
+        dependency_files[file_id].dependencies.append(dep)
+
+    for dep_file in dependency_files:
+        dep_file.is_valid = len(dep_file.dependencies) > 0
+    return dependency_files
+
+
+def _encode_strings(columns):
+    # replaces every string by its index in a shared table
+    table = {}
+
+    def index(value):
+        if value is None:
+            return None
+        return table.setdefault(value, len(table))
+
+    encoded = {}
+    for group, group_columns in columns.items():
+        encoded[group] = {}
+        for column, values in group_columns.items():
+            if column in INT_COLUMNS:
+                encoded[group][column] = values
+            elif column in LIST_COLUMNS:
+                encoded[group][column] = [
+                    None if v is None else [index(s) for s in v]
+                    for v in values
+                ]
+            else:
+                encoded[group][column] = [index(v) for v in values]
+    return list(table), encoded
+
+
+def _decode_strings(strings, encoded):
+    columns = {}
+    for group, group_columns in encoded.items():
+        columns[group] = {}
+        for column, values in group_columns.items():
+            if column in INT_COLUMNS:
+                columns[group][column] = values
+            elif column in LIST_COLUMNS:
+                columns[group][column] = [
+                    None if v is None else [strings[i] for i in v]
+                    for v in values
+                ]
+            else:
+                columns[group][column] = [
+                    None if i is None else strings[i] for i in values
+                ]
+    return columns
+
+
+def _header(**fields):
+    return dict(fields, format="dparse-columnar", version=FORMAT_VERSION)
+
+
+def _check_header(header):
+    if header.get("format") != "dparse-columnar" or \
+            header.get("version") != FORMAT_VERSION:
+        raise ValueError("Not a dparse columnar file, or another version")
+
+
+def _dump_jsonl(columns, fp):
+    # a header line with the string table, then one line per column
+    strings, encoded = _encode_strings(columns)
+    lines = [_header(strings=strings)]
+    for group, group_columns in encoded.items():
+        for column, values in group_columns.items():
+            lines.append({"group": group, "column": column,
+                          "values": values})
+    for line in lines:
+        fp.write(json.dumps(line, separators=(",", ":")).encode("utf-8"))
+        fp.write(b"\n")
+
+
+def _load_jsonl(fp):
+    from .parser import load_json
+
+    lines = iter(fp)
+    header = load_json(next(lines))
+    _check_header(header)
+    encoded = {"files": {}, "dependencies": {}}
+    for line in lines:
+        if line.strip():
+            data = load_json(line)
+            encoded[data["group"]][data["column"]] = data["values"]
+    return _decode_strings(header["strings"], encoded)
+
+
+def _dump_msgpack(columns, fp):
+    import msgpack
+
+    strings, encoded = _encode_strings(columns)
+    header = _header(strings=strings, columns=encoded)
+    fp.write(msgpack.packb(header, use_bin_type=True))
+
+
+def _load_msgpack(fp):
+    import msgpack
+
+    header = msgpack.unpackb(fp.read(), raw=False)
+    _check_header(header)
+    return _decode_strings(header["strings"], header["columns"])
+
+
+def to_arrow(dependency_files):
+    """
+    Returns the dependencies as a pyarrow Table, one row per dependency
+    with its string columns dictionary encoded. The file columns are
+    stored as JSON in the schema metadata, so files without dependencies
+    are kept.
+
+    :param dependency_files: iterable of DependencyFile
+    :return: pyarrow.Table
+    """
+    import pyarrow as pa
+
+    columns = to_columns(dependency_files)
+    string = pa.dictionary(pa.int32(), pa.string())
+    fields, arrays = [], []
+    for column in DEPENDENCY_COLUMNS:
+        values = columns["dependencies"][column]
+        if column == "file_id":
+            array = pa.array(values, pa.int32())
+        elif column in INT_COLUMNS:
+            array = pa.array(values, pa.list_(pa.int64(), 2))
+        elif column in LIST_COLUMNS:
+            array = pa.array(values, pa.list_(pa.string())).cast(
+                pa.list_(string))
+        else:
+            array = pa.array(values, pa.string()).dictionary_encode()
+        fields.append(pa.field(column, array.type))
+        arrays.append(array)
+    metadata = _header(files=columns["files"])
+    return pa.Table.from_arrays(
+        arrays, schema=pa.schema(fields, metadata={
+            b"dparse": json.dumps(metadata).encode("utf-8")}))
+
+
+def from_arrow(table):
+    """
+    Rebuilds the dependency files of to_arrow().
+
+    :param table: pyarrow.Table
+    :return: list of DependencyFile
+    """
+    metadata = json.loads(table.schema.metadata[b"dparse"])
+    _check_header(metadata)
+    dependencies = {}
+    for column in DEPENDENCY_COLUMNS:
+        array = table.column(column)
+        dependencies[column] = array.to_pylist()
+    return from_columns({"files": metadata["files"],
+                         "dependencies": dependencies})
+
+
+def default_format():
+    """
+    Parquet with pyarrow installed, otherwise msgpack with msgpack
+    installed, otherwise JSON lines.
+
+    :return: str
+    """
+    for name, module in ((PARQUET, "pyarrow"), (MSGPACK, "msgpack")):
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        return name
+    return JSONL
+
+
+def dump(dependency_files, fp, format=None):
+    """
+    Writes dependency files to a binary file object.
+
+    :param dependency_files: iterable of DependencyFile
+    :param fp: binary file object
+    :param format: PARQUET, MSGPACK or JSONL, defaults to default_format()
+    """
+    format = format or default_format()
+    if format == PARQUET:
+        import pyarrow.parquet as pq
+
+        pq.write_table(to_arrow(dependency_files), fp)
+    elif format == MSGPACK:
+        _dump_msgpack(to_columns(dependency_files), fp)
+    elif format == JSONL:
+        _dump_jsonl(to_columns(dependency_files), fp)
+    else:
+        raise ValueError("Unknown format {!r}".format(format))
+
+
+def load(fp):
+    """
+    Reads the dependency files written by dump(), in any format.
+
+    :param fp: binary file object, seekable for Parquet
+    :return: list of DependencyFile
+    """
+    start = fp.tell()
+    magic = fp.read(4)
+    fp.seek(start)
+    if magic == PARQUET_MAGIC:
+        import pyarrow.parquet as pq
+
+        return from_arrow(pq.read_table(fp))
+    if magic[:1] == b"{":
+        return from_columns(_load_jsonl(fp))
+    return from_columns(_load_msgpack(fp))
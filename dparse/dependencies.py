@@ -1,7 +1,8 @@
 import json
 from json import JSONEncoder
+from json.encoder import encode_basestring_ascii as _json_str
 
-from . import filetypes, errors
+from . import errors, registry
 
 
 class Dependency:
@@ -9,33 +10,92 @@ class Dependency:
 
     """
 
-    def __init__(self, name, specs, line, source="pypi", meta={}, extras=[],
-                 line_numbers=None, index_server=None, hashes=(),
-                 dependency_type=None, sections=None):
+    __slots__ = (
+        "name", "key", "_specs", "line", "source", "_meta", "line_numbers",
+        "index_server", "hashes", "dependency_type", "_extras", "sections",
+        "section", "offsets"
+    )
+
+    def __init__(self, name, specs, line, source="pypi", meta=None,
+                 extras=None, line_numbers=None, index_server=None, hashes=(),
+                 dependency_type=None, sections=None, section=None,
+                 offsets=None):
         """
 
         :param name:
-        :param specs:
+        :param specs: SpecifierSet, or a str turned into one on first access
         :param line:
         :param source:
-        :param extras:
-        :param line_numbers:
+        :param meta: defaults to a new dict
+        :param extras: defaults to a new list
+        :param line_numbers: (first, last) zero-based physical lines the
+                             dependency spans, continuation lines included
         :param index_server:
         :param hashes:
         :param dependency_type:
+        :param sections:
+        :param section: the pyproject.toml section the dependency is in
+        :param offsets: (start, end) character offsets of line in the content
         """
         self.name = name
         self.key = name.lower().replace("_", "-")
-        self.specs = specs
+        self._specs = specs
         self.line = line
         self.source = source
-        self.meta = meta
+        # meta and extras are created on first access, most dependencies
+        # never get either
+        self._meta = meta
         self.line_numbers = line_numbers
         self.index_server = index_server
         self.hashes = hashes
         self.dependency_type = dependency_type
-        self.extras = extras
+        self._extras = extras
         self.sections = sections
+        self.section = section
+        self.offsets = offsets
+
+    @property
+    def specs(self):
+        specs = self._specs
+        if isinstance(specs, str):
+            from packaging.specifiers import SpecifierSet
+            specs = self._specs = SpecifierSet(specs)
+        return specs
+
+    @specs.setter
+    def specs(self, value):
+        self._specs = value
+
+    @property
+    def spec_string(self):
+        """
+        The specifier as a str, without building a SpecifierSet for it.
+
+        :return:
+        """
+        if isinstance(self._specs, str):
+            return self._specs
+        return str(self._specs)
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            self._meta = {}
+        return self._meta
+
+    @meta.setter
+    def meta(self, value):
+        self._meta = value
+
+    @property
+    def extras(self):
+        if self._extras is None:
+            self._extras = []
+        return self._extras
+
+    @extras.setter
+    def extras(self, value):
+        self._extras = value
 
     def __str__(self):  # pragma: no cover
         """
@@ -53,18 +113,23 @@ class Dependency:
 
         :return:
         """
+        return self._serialize(self.specs)
+
+    def _serialize(self, specs):
         return {
             "name": self.name,
-            "specs": self.specs,
+            "specs": specs,
             "line": self.line,
             "source": self.source,
-            "meta": self.meta,
+            "meta": self._meta if self._meta is not None else {},
             "line_numbers": self.line_numbers,
             "index_server": self.index_server,
             "hashes": self.hashes,
             "dependency_type": self.dependency_type,
-            "extras": self.extras,
-            "sections": self.sections
+            "extras": self._extras if self._extras is not None else [],
+            "sections": self.sections,
+            "section": self.section,
+            "offsets": self.offsets
         }
 
     @classmethod
@@ -99,77 +164,93 @@ class DparseJSONEncoder(JSONEncoder):
         return JSONEncoder.default(self, o)
 
 
+def _json_value(value):
+    if value is None:
+        return "null"
+    if isinstance(value, str):
+        return _json_str(value)
+    return json.dumps(value, cls=DparseJSONEncoder)
+
+
+def _json_strings(values):
+    if values is None:
+        return "null"
+    return "[" + ",".join([_json_str(value) for value in values]) + "]"
+
+
+def _json_pair(pair):
+    if pair is None:
+        return "null"
+    return "[{},{}]".format(*pair)
+
+
+def _dependency_json(dep):
+    # the fields of Dependency.serialize(), in the same order, encoded by
+    # their known types rather than by walking a dict
+    meta = dep._meta
+    return "".join((
+        '{"name":', _json_str(dep.name),
+        ',"specs":', _json_str(dep.spec_string),
+        ',"line":', _json_value(dep.line),
+        ',"source":', _json_value(dep.source),
+        ',"meta":', _json_value(meta) if meta else "{}",
+        ',"line_numbers":', _json_pair(dep.line_numbers),
+        ',"index_server":', _json_value(dep.index_server),
+        ',"hashes":', _json_strings(dep.hashes),
+        ',"dependency_type":', _json_value(dep.dependency_type),
+        ',"extras":', _json_strings(dep._extras or ()),
+        ',"sections":', _json_strings(dep.sections),
+        ',"section":', _json_value(dep.section),
+        ',"offsets":', _json_pair(dep.offsets),
+        "}",
+    ))
+
+
 class DependencyFile:
     """
 
     """
 
     def __init__(self, content, path=None, sha=None, file_type=None,
-                 marker=((), ()), parser=None, resolve=False):
+                 marker=((), ()), parser=None, resolve=False, cache=None,
+                 resolver=None):
         """
 
-        :param content:
+        :param content: str, text file object or iterable of lines
         :param path:
         :param sha:
         :param marker:
         :param file_type:
         :param parser:
+        :param cache: optional dparse.cache.ParseCache
+        :param resolver: optional dparse.resolver.IncludeResolver used when
+                         resolve is set, pass the same one to many files to
+                         parse shared includes only once
         """
         self.content = content
         self.file_type = file_type
         self.path = path
         self.sha = sha
         self.marker = marker
+        self.cache = cache
+        self.resolver = resolver
+        # normalized paths of the files that included this one, set by the
+        # resolver
+        self.include_chain = ()
 
         self.dependencies = []
         self.resolved_files = []
+        # set by the parser for every include found, resolvable or not
+        self.has_includes = False
         self.is_valid = False
         self.file_marker, self.line_marker = marker
 
-        if parser:
-            self.parser = parser
-        else:
-            from . import parser as parser_class
-            if file_type is not None:
-                if file_type == filetypes.requirements_txt:
-                    self.parser = parser_class.RequirementsTXTParser
-                elif file_type == filetypes.tox_ini:
-                    self.parser = parser_class.ToxINIParser
-                elif file_type == filetypes.conda_yml:
-                    self.parser = parser_class.CondaYMLParser
-                elif file_type == filetypes.pipfile:
-                    self.parser = parser_class.PipfileParser
-                elif file_type == filetypes.pipfile_lock:
-                    self.parser = parser_class.PipfileLockParser
-                elif file_type == filetypes.setup_cfg:
-                    self.parser = parser_class.SetupCfgParser
-                elif file_type == filetypes.poetry_lock:
-                    self.parser = parser_class.PoetryLockParser
-                elif file_type == filetypes.pyproject_toml:
-                    self.parser = parser_class.PyprojectTomlParser
-
-            elif path is not None:
-                if path.endswith((".txt", ".in")):
-                    self.parser = parser_class.RequirementsTXTParser
-                elif path.endswith(".yml"):
-                    self.parser = parser_class.CondaYMLParser
-                elif path.endswith(".ini"):
-                    self.parser = parser_class.ToxINIParser
-                elif path.endswith("Pipfile"):
-                    self.parser = parser_class.PipfileParser
-                elif path.endswith("Pipfile.lock"):
-                    self.parser = parser_class.PipfileLockParser
-                elif path.endswith("setup.cfg"):
-                    self.parser = parser_class.SetupCfgParser
-                elif path.endswith(filetypes.poetry_lock):
-                    self.parser = parser_class.PoetryLockParser
-                elif path.endswith(filetypes.pyproject_toml):
-                    self.parser = parser_class.PyprojectTomlParser
-
-        if not hasattr(self, "parser"):
-            raise errors.UnknownDependencyFileError
-
-        self.parser = self.parser(self, resolve=resolve)
+        if not parser:
+            parser = registry.parser_for(file_type, path)
+            if parser is None:
+                raise errors.UnknownDependencyFileError
+
+        self.parser = parser(self, resolve=resolve)
 
     @property
     def resolved_dependencies(self):
@@ -186,13 +267,17 @@ class DependencyFile:
 
         :return:
         """
+        return self._serialize(Dependency.serialize)
+
+    def _serialize(self, serialize_dependency):
         return {
             "file_type": self.file_type,
             "content": self.content,
             "path": self.path,
             "sha": self.sha,
-            "dependencies": [dep.serialize() for dep in self.dependencies],
-            "resolved_dependencies": [dep.serialize() for dep in
+            "dependencies": [serialize_dependency(dep)
+                             for dep in self.dependencies],
+            "resolved_dependencies": [serialize_dependency(dep) for dep in
                                       self.resolved_dependencies]
         }
 
@@ -209,12 +294,52 @@ class DependencyFile:
         instance.dependencies = dependencies
         return instance
 
+    def write_json(self, fp, content=True):
+        """
+        Writes the JSON document of serialize() to a text file object,
+        compact and one dependency at a time, without building the dicts
+        of serialize() first. Specifiers are written as their spec_string,
+        those never accessed as they were parsed.
+
+        :param fp: text file object
+        :param content: False to leave out the content
+        """
+        write = fp.write
+        write('{"file_type":' + _json_value(self.file_type))
+        if content:
+            write(',"content":' + _json_value(self.content))
+        write(',"path":' + _json_value(self.path) +
+              ',"sha":' + _json_value(self.sha) + ',"dependencies":[')
+        # the own dependencies come first in resolved_dependencies as well
+        encoded = []
+        for dep in self.dependencies:
+            chunk = _dependency_json(dep)
+            write("," + chunk if encoded else chunk)
+            encoded.append(chunk)
+        write('],"resolved_dependencies":[')
+        write(",".join(encoded))
+        separator = "," if encoded else ""
+        for dep in self._iter_included_dependencies():
+            write(separator + _dependency_json(dep))
+            separator = ","
+        write("]}")
+
+    def _iter_included_dependencies(self):
+        for d in self.resolved_files:
+            if isinstance(d, DependencyFile):
+                yield from d.dependencies
+                yield from d._iter_included_dependencies()
+
     def json(self):  # pragma: no cover
         """
 
         :return:
         """
-        return json.dumps(self.serialize(), indent=2, cls=DparseJSONEncoder)
+        # the specifiers go in as their spec_string, lock files keep them
+        # as str and never have to build a SpecifierSet for the JSON
+        return json.dumps(
+            self._serialize(lambda dep: dep._serialize(dep.spec_string)),
+            indent=2, cls=DparseJSONEncoder)
 
     def parse(self):
         """
@@ -224,8 +349,47 @@ class DependencyFile:
         if self.parser.is_marked_file:
             self.is_valid = False
             return self
+
+        key = None
+        if self.cache is not None and (
+                self.sha is not None or isinstance(self.content, str)):
+            from .cache import cache_key
+            key = cache_key(self)
+            dependencies = self.cache.get(key)
+            if dependencies is not None:
+                self.dependencies = dependencies
+                self.is_valid = len(self.dependencies) > 0
+                return self
+
         self.parser.parse()
 
+        # files including other files are not cached, the included files
+        # may have changed in the meantime, or been skipped for want of a
+        # path
+        if key is not None and not self.has_includes and \
+                not self.resolved_files:
+            self.cache.set(key, self.dependencies)
+
         self.is_valid = len(self.dependencies) > 0 or len(
             self.resolved_files) > 0
         return self
+
+    def iter_dependencies(self):
+        """
+        Yields the dependencies as the parser finds them, without storing
+        them in self.dependencies and without going through the cache.
+
+        The content may also be a text file object or an iterable of lines,
+        requirements.txt-like files are then read line by line. Streamed
+        content can only be iterated once.
+
+        :return:
+        """
+        if self.parser.is_marked_file:
+            self.is_valid = False
+            return
+        found = False
+        for dependency in self.parser.iter_dependencies():
+            found = True
+            yield dependency
+        self.is_valid = found or len(self.resolved_files) > 0
@@ -0,0 +1,94 @@
+from collections import namedtuple
+
+COMMENT = "comment"
+INDEX_SERVER = "index_server"
+INCLUDE = "include"
+OPTION = "option"
+REQUIREMENT = "requirement"
+
+INDEX_SERVER_PREFIXES = ('-i', '--index-url', '--extra-index-url')
+INCLUDE_PREFIXES = ('-r', '--requirement')
+IGNORED_OPTION_PREFIXES = (
+    '-f', '--find-links', '--no-index', '--allow-external',
+    '--allow-unverified', '-Z', '--always-unzip'
+)
+
+#: option name -> token kind, short options may have their value attached
+#: ("-rbase.txt"), long ones are separated from it by "=" or whitespace
+OPTION_KINDS = dict(
+    [(prefix, INDEX_SERVER) for prefix in INDEX_SERVER_PREFIXES] +
+    [(prefix, INCLUDE) for prefix in INCLUDE_PREFIXES] +
+    [(prefix, OPTION) for prefix in IGNORED_OPTION_PREFIXES]
+)
+
+
+def option_kind(line):
+    """
+    Returns the kind of the option line starts with, or None if it does not
+    start with a known option.
+
+    :param line: a stripped line starting with "-"
+    :return: INDEX_SERVER, INCLUDE, OPTION or None
+    """
+    if line[1:2] != '-':
+        return OPTION_KINDS.get(line[:2])
+    end = len(line)
+    for separator in ('=', ' ', '\t'):
+        index = line.find(separator, 2, end)
+        if index != -1:
+            end = index
+    return OPTION_KINDS.get(line[:end])
+
+
+Token = namedtuple(
+    "Token", ["kind", "line", "parseable_line", "start", "end"]
+)
+Token.__doc__ = """
+A logical line of a requirements.txt-like file.
+
+:param kind: one of COMMENT, INDEX_SERVER, INCLUDE, OPTION or REQUIREMENT
+:param line: the original text, continuation lines joined with a newline
+:param parseable_line: for requirements, the line joined without its
+    continuation backslashes; the stripped line for everything else
+:param start: index of the first physical line
+:param end: index of the last physical line
+"""
+
+
+def tokenize(lines):
+    """
+    Classifies every logical line of a requirements.txt-like file in a single
+    pass, joining backslash continuations of requirement lines.
+
+    :param lines: iterable of physical lines, without line endings
+    :return: generator of Token
+    """
+    lines = iter(lines)
+    num = -1
+    for raw in lines:
+        num += 1
+        line = raw.rstrip()
+        if not line:
+            continue
+        if line[0] == '#':
+            yield Token(COMMENT, line, line, num, num)
+            continue
+        if line[0] == '-':
+            kind = option_kind(line)
+            if kind is not None:
+                yield Token(kind, line, line, num, num)
+                continue
+        if "\\" in line:
+            start = num
+            raw_lines = [line]
+            for next_line in lines:
+                num += 1
+                raw_lines.append(next_line)
+                if "\\" not in next_line:
+                    break
+            # joined first, the backslashes are removed in a single pass
+            parseable_line = line + "".join(map(str.strip, raw_lines[1:]))
+            yield Token(REQUIREMENT, "\n".join(raw_lines),
+                        parseable_line.replace("\\", ""), start, num)
+        else:
+            yield Token(REQUIREMENT, line, line, num, num)
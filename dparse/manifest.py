@@ -0,0 +1,350 @@
+"""Incremental re-scans of a tree, driven by a persisted manifest."""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+
+from .cache import _load_dependency
+from .dependencies import DependencyFile, DparseJSONEncoder
+from .parser import parse_many
+from .scan import EXCLUDED_DIRS, walk
+
+# bump whenever the manifest format changes
+MANIFEST_VERSION = 3
+
+# a file changed this close to the previous scan may have changed again
+# within the same mtime tick, its stat is not trusted
+MTIME_SLACK_NS = 2 * 10 ** 9
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+
+ManifestEntry = namedtuple(
+    "ManifestEntry", ["size", "mtime_ns", "sha", "file_type", "dependencies",
+                      "resolve", "includes"]
+)
+ManifestEntry.__doc__ = """
+:param resolve: whether the file was parsed with resolve=True
+:param includes: list of IncludeEntry, in source order
+"""
+
+IncludeEntry = namedtuple(
+    "IncludeEntry", ["path", "size", "mtime_ns", "sha", "dependencies",
+                     "includes"]
+)
+IncludeEntry.__doc__ = """
+A file included with -r, and the files it includes in turn. Includes that
+were not resolved, e.g. missing files, only have a path; size, mtime_ns
+and sha are None.
+"""
+
+RescanResult = namedtuple(
+    "RescanResult", ["path", "status", "dependency_file", "error", "diff"]
+)
+RescanResult.__doc__ = """
+:param path: path of the file
+:param status: ADDED, REMOVED, CHANGED or UNCHANGED
+:param dependency_file: the DependencyFile, restored from the manifest for
+    unchanged files and without content; None for removed and broken files
+:param error: the error raised while reading or parsing the file
+:param diff: DependencyDiff against the previous scan, None on errors
+"""
+
+DependencyDiff = namedtuple("DependencyDiff", ["added", "removed", "changed"])
+DependencyDiff.__doc__ = """
+:param added: list of Dependency
+:param removed: list of Dependency
+:param changed: list of (old, new) Dependency tuples
+"""
+
+
+class Manifest:
+    """
+    The size, mtime, sha and dependencies of every file found by a scan,
+    keyed by their path relative to the scanned root.
+    """
+
+    def __init__(self, path=None):
+        """
+
+        :param path: file the manifest is loaded from and saved to
+        """
+        self.path = path
+        self.entries = {}
+        self.scanned_at_ns = 0
+
+    @classmethod
+    def load(cls, path):
+        """
+        Loads the manifest at path. A missing or unreadable manifest, or
+        one written by another dparse version, loads as an empty one.
+
+        :param path:
+        :return: Manifest
+        """
+        from . import __version__
+
+        manifest = cls(path)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        if data.get("version") != [MANIFEST_VERSION, __version__]:
+            return manifest
+        manifest.scanned_at_ns = data["scanned_at_ns"]
+        for name, entry in data["entries"].items():
+            manifest.entries[name] = ManifestEntry(
+                entry["size"], entry["mtime_ns"], entry["sha"],
+                entry["file_type"],
+                [_load_dependency(d) for d in entry["dependencies"]],
+                entry["resolve"], _load_includes(entry["includes"])
+            )
+        return manifest
+
+    def save(self, path=None):
+        """
+        Writes the manifest atomically.
+
+        :param path: defaults to the path it was loaded from
+        """
+        from . import __version__
+
+        path = path or self.path
+        data = {
+            "version": [MANIFEST_VERSION, __version__],
+            "scanned_at_ns": self.scanned_at_ns,
+            "entries": {
+                name: {
+                    "size": entry.size,
+                    "mtime_ns": entry.mtime_ns,
+                    "sha": entry.sha,
+                    "file_type": entry.file_type,
+                    "dependencies": [dep.serialize() for dep in
+                                     entry.dependencies],
+                    "resolve": entry.resolve,
+                    "includes": _dump_includes(entry.includes),
+                }
+                for name, entry in self.entries.items()
+            }
+        }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, cls=DparseJSONEncoder)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+
+def _dump_includes(includes):
+    return [
+        {
+            "path": include.path,
+            "size": include.size,
+            "mtime_ns": include.mtime_ns,
+            "sha": include.sha,
+            "dependencies": [dep.serialize() for dep in
+                             include.dependencies],
+            "includes": _dump_includes(include.includes),
+        }
+        for include in includes
+    ]
+
+
+def _load_includes(data):
+    return [
+        IncludeEntry(
+            include["path"], include["size"], include["mtime_ns"],
+            include["sha"],
+            [_load_dependency(d) for d in include["dependencies"]],
+            _load_includes(include["includes"])
+        )
+        for include in data
+    ]
+
+
+def _sha(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _include_entries(dep_file):
+    includes = []
+    for included in dep_file.resolved_files:
+        if not isinstance(included, DependencyFile):
+            includes.append(IncludeEntry(included, None, None, None, [], []))
+            continue
+        try:
+            stat = os.stat(included.path)
+        except OSError:
+            includes.append(
+                IncludeEntry(included.path, None, None, None, [], []))
+            continue
+        includes.append(IncludeEntry(
+            included.path, stat.st_size, stat.st_mtime_ns,
+            _sha(included.content), list(included.dependencies),
+            _include_entries(included)
+        ))
+    return includes
+
+
+def _includes_fresh(includes, trusted_before_ns):
+    # unresolved includes are not checked
+    for include in includes:
+        if include.size is None:
+            continue
+        try:
+            stat = os.stat(include.path)
+        except OSError:
+            return False
+        if include.size != stat.st_size or \
+                include.mtime_ns != stat.st_mtime_ns or \
+                include.mtime_ns >= trusted_before_ns or \
+                not _includes_fresh(include.includes, trusted_before_ns):
+            return False
+    return True
+
+
+def _include_shas(includes):
+    return tuple((include.path, include.sha, _include_shas(include.includes))
+                 for include in includes)
+
+
+def _signature(dependency):
+    # str() of a SpecifierSet is normalized, raw specifier strings are not
+    return (str(dependency.specs), tuple(sorted(dependency.extras)),
+            tuple(dependency.hashes), dependency.dependency_type)
+
+
+def diff_dependencies(old, new):
+    """
+    Compares two lists of dependencies by key and section. Dependencies
+    are changed when their specifier, extras or hashes differ.
+
+    :param old: list of Dependency
+    :param new: list of Dependency
+    :return: DependencyDiff
+    """
+    def group(dependencies):
+        groups = {}
+        for dependency in dependencies:
+            groups.setdefault((dependency.key, dependency.section),
+                              []).append(dependency)
+        return groups
+
+    old_groups, new_groups = group(old), group(new)
+    added, removed, changed = [], [], []
+    for key, new_deps in new_groups.items():
+        old_deps = old_groups.get(key, [])
+        for old_dep, new_dep in zip(old_deps, new_deps):
+            if _signature(old_dep) != _signature(new_dep):
+                changed.append((old_dep, new_dep))
+        added.extend(new_deps[len(old_deps):])
+        removed.extend(old_deps[len(new_deps):])
+    for key, old_deps in old_groups.items():
+        if key not in new_groups:
+            removed.extend(old_deps)
+    return DependencyDiff(added, removed, changed)
+
+
+def _restore(path, entry, file_type=None):
+    dep_file = DependencyFile(content=None, path=path, sha=entry.sha,
+                              file_type=file_type)
+    dep_file.dependencies = list(entry.dependencies)
+    for include in entry.includes:
+        dep_file.resolved_files.append(
+            include.path if include.size is None else
+            _restore(include.path, include))
+    dep_file.is_valid = len(dep_file.dependencies) > 0 or \
+        len(dep_file.resolved_files) > 0
+    return dep_file
+
+
+def rescan(root, manifest, exclude=EXCLUDED_DIRS, **kwargs):
+    """
+    Scans root like scan_tree, but only parses the files whose size or
+    mtime differ from the manifest. Unchanged files are restored from the
+    manifest, which is updated in place; save it once the generator is
+    exhausted.
+
+    With resolve=True, the files included with -r are tracked along with
+    their includer, inside the tree or not: a change to one of them marks
+    the includer as changed and unchanged files are restored with their
+    resolved_files. The diff only covers the file's own dependencies.
+
+    :param root: str or os.PathLike
+    :param manifest: Manifest
+    :param exclude: names of the directories to skip
+    :param kwargs: passed to parse_many()
+    :return: generator of RescanResult
+    """
+    root = os.fspath(root)
+    scanned_at_ns = time.time_ns()
+    resolve = bool(kwargs.get("resolve"))
+    trusted_before_ns = manifest.scanned_at_ns - MTIME_SLACK_NS
+    previous = manifest.entries
+    entries = {}
+    seen = set()
+    stats = {}
+    to_parse = []
+
+    for path, file_type in walk(root, exclude):
+        name = os.path.relpath(path, root)
+        seen.add(name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entry = previous.get(name)
+        if entry is not None and entry.file_type == file_type and \
+                entry.resolve == resolve and \
+                entry.size == stat.st_size and \
+                entry.mtime_ns == stat.st_mtime_ns and \
+                entry.mtime_ns < trusted_before_ns and \
+                _includes_fresh(entry.includes, trusted_before_ns):
+            entries[name] = entry
+            yield RescanResult(path, UNCHANGED,
+                               _restore(path, entry, entry.file_type), None,
+                               DependencyDiff([], [], []))
+        else:
+            stats[path] = (name, stat)
+            to_parse.append((None, path, file_type))
+
+    for result in parse_many(to_parse, **kwargs):
+        name, stat = stats[result.path]
+        entry = previous.get(name)
+        status = ADDED if entry is None else CHANGED
+        if result.error is not None:
+            yield RescanResult(result.path, status, None, result.error, None)
+            continue
+        dep_file = result.dependency_file
+        sha = _sha(dep_file.content)
+        dependencies = dep_file.dependencies
+        includes = _include_entries(dep_file)
+        entries[name] = ManifestEntry(stat.st_size, stat.st_mtime_ns, sha,
+                                      dep_file.file_type, dependencies,
+                                      resolve, includes)
+        if entry is not None and entry.sha == sha and \
+                _include_shas(entry.includes) == _include_shas(includes):
+            status = UNCHANGED
+        dep_file.sha = sha
+        yield RescanResult(
+            result.path, status, dep_file, None,
+            diff_dependencies(entry.dependencies if entry else [],
+                              dependencies)
+        )
+
+    for name, entry in previous.items():
+        if name not in seen:
+            yield RescanResult(os.path.join(root, name), REMOVED, None, None,
+                               diff_dependencies(entry.dependencies, []))
+
+    manifest.entries = entries
+    manifest.scanned_at_ns = scanned_at_ns
@@ -1,26 +1,36 @@
+from __future__ import annotations
+
+import codecs
+import mmap
 import os
-from collections import OrderedDict
-import re
 import sys
-
-from configparser import ConfigParser, NoOptionError
-from pathlib import PurePath
+from bisect import bisect_right
+from collections import deque, namedtuple
+from collections.abc import Iterator
+from functools import lru_cache
+from itertools import accumulate, islice
 
 from .errors import MalformedDependencyFileError
-from .regex import HASH_REGEX
+from .regex import HASH_SPLIT_PATTERN, INDEX_SERVER_SPLIT_PATTERN, \
+    LINE_PREFIX_PATTERN, LINE_SUFFIX_PATTERN, INI_LINE_PREFIX_PATTERN, \
+    YAML_LINE_PREFIX_PATTERN, TOML_LINE_PREFIX_PATTERN, \
+    TOML_LINE_SUFFIX_PATTERN, SPECIFIER_PATTERN
 
 from .dependencies import DependencyFile, Dependency
-from packaging.requirements import Requirement as PackagingRequirement,\
-    InvalidRequirement
+from . import lexer
 from . import filetypes
-from packaging.specifiers import SpecifierSet
-from packaging.version import Version, InvalidVersion
-import json
 
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    import tomli as tomllib
+# packaging, configparser, tomllib, json and concurrent.futures are imported
+# by the code using them, importing dparse should stay cheap for callers
+# needing a single parser
+
+
+def _tomllib():
+    if sys.version_info >= (3, 11):
+        import tomllib
+    else:
+        import tomli as tomllib
+    return tomllib
 
 
 # this is a backport from setuptools 26.1
@@ -72,21 +82,24 @@ def setuptools_parse_requirements_backport(strs):  # pragma: no cover
         if line.endswith('\\'):
             line = line[:-2].strip()
             line += next(lines)
-        yield PackagingRequirement(line)
+        from packaging.requirements import Requirement
+        yield Requirement(line)
 
 
-class RequirementsTXTLineParser:
-    """
+ParsedRequirement = namedtuple(
+    "ParsedRequirement", ["name", "specifier", "extras", "marker"]
+)
 
-    """
 
-    @classmethod
-    def parse(cls, line):
-        """
+def _parse_requirement(line, logical):
+    from packaging.requirements import Requirement, InvalidRequirement
 
-        :param line:
-        :return:
-        """
+    if logical:
+        try:
+            parsed = Requirement(line)
+        except InvalidRequirement:
+            return None
+    else:
         try:
             # setuptools requires a space before the comment.
             # If this isn't the case, add it.
@@ -97,14 +110,127 @@ class RequirementsTXTLineParser:
                 parsed, = setuptools_parse_requirements_backport(line)
         except InvalidRequirement:
             return None
-        dep = Dependency(
+    return ParsedRequirement(
+        parsed.name, parsed.specifier, frozenset(parsed.extras),
+        parsed.marker
+    )
+
+
+def check_specifiers(specs):
+    """
+    Raises a MalformedDependencyFileError unless specs is a valid PEP 440
+    specifier set. Lets parsers keep the raw str, building the SpecifierSet
+    lazily, and still reject bad specifiers while parsing.
+
+    :param specs: str
+    :return: specs
+    """
+    for clause in specs.split(","):
+        if clause.strip() and not SPECIFIER_PATTERN.fullmatch(clause):
+            raise MalformedDependencyFileError(
+                info="Invalid specifier: {!r}".format(specs))
+    return specs
+
+
+_json_loads = None
+
+
+def load_json(content):
+    """
+    Loads a JSON document with orjson when it is installed, falling back to
+    the standard library. Both raise a ValueError on malformed input.
+
+    :param content: str
+    :return:
+    """
+    global _json_loads
+    if _json_loads is None:
+        try:
+            import orjson
+            _json_loads = orjson.loads
+        except ImportError:
+            import json
+            _json_loads = json.loads
+    return _json_loads(content)
+
+
+class RequirementsTXTLineParser:
+    """
+
+    """
+
+    #: number of distinct requirement strings kept parsed in memory, the
+    #: dependencies built from one string share the same SpecifierSet
+    cache_size = 8192
+
+    _parse_requirement = staticmethod(
+        lru_cache(cache_size)(_parse_requirement))
+
+    @classmethod
+    def cache_info(cls):
+        """
+        Hit and miss counters of the requirement string cache.
+
+        :return: functools CacheInfo(hits, misses, maxsize, currsize)
+        """
+        return cls._parse_requirement.cache_info()
+
+    @classmethod
+    def set_cache_size(cls, maxsize):
+        """
+        Replaces the requirement string cache with an empty one holding up to
+        maxsize entries, None for unbounded and 0 to disable it.
+
+        :param maxsize:
+        """
+        cls.cache_size = maxsize
+        cls._parse_requirement = staticmethod(
+            lru_cache(maxsize)(_parse_requirement))
+
+    @classmethod
+    def cache_clear(cls):
+        cls._parse_requirement.cache_clear()
+
+    @classmethod
+    def _to_dependency(cls, parsed, line):
+        if parsed is None:
+            return None
+        return Dependency(
             name=parsed.name,
             specs=parsed.specifier,
             line=line,
-            extras=parsed.extras,
+            extras=set(parsed.extras),
             dependency_type=filetypes.requirements_txt
         )
-        return dep
+
+    @classmethod
+    def parse(cls, line):
+        """
+
+        :param line:
+        :return:
+        """
+        return cls._to_dependency(cls._parse_requirement(line, False), line)
+
+    @classmethod
+    def parse_logical_line(cls, line):
+        """
+        Parses a single logical line that has already been joined by the
+        lexer, skipping the line splitting done by the setuptools backport.
+
+        :param line:
+        :return:
+        """
+        line = line.strip()
+        if not line or line[0] == '#':
+            return None
+        # a hash without a space may be in a URL
+        if "#" in line:
+            for sep in (" #", "\t#"):
+                pos = line.find(sep)
+                if pos != -1:
+                    line = line[:pos]
+        return cls._to_dependency(cls._parse_requirement(line, True), line)
 
 
 class Parser:
@@ -112,6 +238,10 @@ class Parser:
 
     """
 
+    # see locate()
+    line_prefix_pattern = LINE_PREFIX_PATTERN
+    line_suffix_pattern = LINE_SUFFIX_PATTERN
+
     def __init__(self, obj, resolve=False):
         """
 
@@ -120,6 +250,51 @@ class Parser:
         self.obj = obj
         self._lines = None
         self.resolve = resolve
+        # lines already read from a streamed content, see _peek_lines
+        self._head = []
+        self._stream = None
+        # offsets are only known when the original text is at hand
+        self._has_offsets = isinstance(obj.content, str)
+        self._line_starts = None
+        self._cursor = 0
+
+    @property
+    def is_streamed(self):
+        """
+        True if the content is a text file object or an iterable of lines
+        rather than a str. Streamed content can only be iterated once.
+
+        :return:
+        """
+        return not isinstance(self.obj.content, str) and self._lines is None
+
+    def _iter_stream(self):
+        if self._stream is None:
+            self._stream = iter(self.obj.content)
+        head = self._head
+        while head:
+            yield head.pop(0)
+        for line in self._stream:
+            yield line.rstrip("\r\n")
+
+    def _peek_lines(self, count):
+        if self._lines is not None:
+            return self._lines[:count]
+        if isinstance(self.obj.content, str):
+            # only split the head of the content, most formats never need
+            # the full list of lines
+            lines = []
+            for piece in self.obj.content.split("\n", count)[:count]:
+                lines.extend(piece.splitlines() or [""])
+            return lines[:count]
+        if self._stream is None:
+            self._stream = iter(self.obj.content)
+        while len(self._head) < count:
+            try:
+                self._head.append(next(self._stream).rstrip("\r\n"))
+            except StopIteration:
+                break
+        return self._head[:count]
 
     def iter_lines(self, lineno=0):
         """
@@ -127,7 +302,10 @@ class Parser:
         :param lineno:
         :return:
         """
-        yield from self.lines[lineno:]
+        if self.is_streamed:
+            yield from islice(self._iter_stream(), lineno, None)
+        else:
+            yield from self.lines[lineno:]
 
     @property
     def lines(self):
@@ -136,23 +314,107 @@ class Parser:
         :return:
         """
         if self._lines is None:
-            self._lines = self.obj.content.splitlines()
+            if isinstance(self.obj.content, str):
+                self._lines = self.obj.content.splitlines()
+            else:
+                self._lines = list(self._iter_stream())
         return self._lines
 
+    @property
+    def content(self):
+        """
+        The content as a str, reading a streamed content to the end.
+
+        :return:
+        """
+        if not isinstance(self.obj.content, str):
+            self.obj.content = "\n".join(self.iter_lines())
+        return self.obj.content
+
+    @property
+    def resolver(self):
+        """
+        The include resolver of the file, created on first use when none was
+        given.
+
+        :return: IncludeResolver
+        """
+        if self.obj.resolver is None:
+            from .resolver import IncludeResolver
+            self.obj.resolver = IncludeResolver()
+        return self.obj.resolver
+
+    @property
+    def line_starts(self):
+        """
+        The offset of the first character of every physical line, followed
+        by the length of the content. None for streamed content.
+
+        :return:
+        """
+        if self._line_starts is None and self._has_offsets:
+            self._line_starts = [0]
+            self._line_starts.extend(accumulate(
+                map(len, self.obj.content.splitlines(keepends=True))))
+        return self._line_starts
+
+    def locate(self, dependency):
+        """
+        Records the offsets and line numbers of dependency.line, searching
+        the content forward from the previously located dependency. Used by
+        formats whose loaders don't report positions.
+
+        :param dependency:
+        """
+        starts = self.line_starts
+        if starts is None or not dependency.line:
+            return
+        content = self.obj.content
+        start = content.find(dependency.line, self._cursor)
+        while start != -1:
+            end = start + len(dependency.line)
+            first = bisect_right(starts, start) - 1
+            last = bisect_right(starts, end - 1) - 1
+            # only a match making up its physical lines counts, not one in
+            # another option's value or in a comment
+            if self.line_prefix_pattern.match(
+                    content, starts[first], start) and \
+                    self.line_suffix_pattern.match(
+                        content, end, starts[last + 1]):
+                self._cursor = end
+                dependency.offsets = (start, end)
+                dependency.line_numbers = (first, last)
+                return
+            start = content.find(dependency.line, start + 1)
+
     @property
     def is_marked_file(self):
         """
 
         :return:
         """
-        for n, line in enumerate(self.iter_lines()):
+        for line in self._peek_lines(3):
             for marker in self.obj.file_marker:
                 if marker in line:
                     return True
-            if n >= 2:
-                break
         return False
 
+    def iter_dependencies(self):
+        """
+        Yields the dependencies as they are found, without storing them on
+        the DependencyFile. Subclasses implement either this or parse().
+
+        :return:
+        """
+        self.parse()
+        yield from self.obj.dependencies
+
+    def parse(self):
+        """
+        Parses the whole file into DependencyFile.dependencies.
+        """
+        self.obj.dependencies.extend(self.iter_dependencies())
+
     def is_marked_line(self, line):
         """
 
@@ -171,10 +433,8 @@ class Parser:
         :param line:
         :return:
         """
-        hashes = []
-        for match in re.finditer(HASH_REGEX, line):
-            hashes.append(line[match.start():match.end()])
-        return re.sub(HASH_REGEX, "", line).strip(), hashes
+        parts = HASH_SPLIT_PATTERN.split(line)
+        return "".join(parts[::2]).strip(), parts[1::2]
 
     @classmethod
     def parse_index_server(cls, line):
@@ -183,7 +443,8 @@ class Parser:
         :param line:
         :return:
         """
-        groups = re.split(pattern=r"[=\s]+", string=line.strip(), maxsplit=100)
+        # only the option and its value are needed
+        groups = INDEX_SERVER_SPLIT_PATTERN.split(line.strip(), maxsplit=2)
 
         if len(groups) >= 2:
             return groups[1] if groups[1].endswith("/") else groups[1] + "/"
@@ -198,6 +459,8 @@ class Parser:
         :param line:
         :return:
         """
+        from pathlib import PurePath
+
         line = line.replace("-r ", "").replace("--requirement ", "")
         normalized_path = PurePath(file_path)
         if " #" in line:
@@ -210,100 +473,100 @@ class RequirementsTXTParser(Parser):
 
     """
 
-    def parse(self):
+    def iter_dependencies(self):
         """
-        Parses a requirements.txt-like file
+        Parses a requirements.txt-like file, yielding the dependencies as
+        they are found. Includes are added to the resolved files.
         """
         index_server = None
-        for num, line in enumerate(self.iter_lines()):
-            line = line.rstrip()
-            if not line:
-                continue
-            if line.startswith('#'):
+        # (position in resolved_files, path, result) of includes resolved on
+        # the resolver's executor
+        pending = []
+        for token in lexer.tokenize(self.iter_lines()):
+            kind, line = token.kind, token.line
+            if kind == lexer.COMMENT:
                 # comments are lines that start with # only
                 continue
-            if line.startswith('-i') or \
-               line.startswith('--index-url') or \
-               line.startswith('--extra-index-url'):
+            if kind == lexer.INDEX_SERVER:
                 # this file is using a private index server, try to parse it
                 index_server = self.parse_index_server(line)
                 continue
-            elif self.obj.path and \
-                    (line.startswith('-r') or
-                     line.startswith('--requirement')):
+            elif kind == lexer.INCLUDE:
+                self.obj.has_includes = True
+                if not self.obj.path:
+                    continue
 
                 req_file_path = self.resolve_file(self.obj.path, line)
 
-                if self.resolve and os.path.exists(req_file_path):
-                    with open(req_file_path) as f:
-                        content = f.read()
-
-                        dep_file = DependencyFile(
-                            content=content,
-                            path=req_file_path,
-                            resolve=True
-                        )
-                        dep_file.parse()
-                        self.obj.resolved_files.append(dep_file)
-                else:
+                if not self.resolve or not os.path.exists(req_file_path):
                     self.obj.resolved_files.append(req_file_path)
+                elif self.resolver.executor is not None:
+                    # the include stays a path until it is resolved at the
+                    # end of the file
+                    pending.append((
+                        len(self.obj.resolved_files), req_file_path,
+                        self.resolver.submit(req_file_path, self.obj)
+                    ))
+                    self.obj.resolved_files.append(req_file_path)
+                else:
+                    dep_file = self.resolver.resolve(req_file_path, self.obj)
+                    # includes closing a cycle stay unresolved
+                    self.obj.resolved_files.append(
+                        req_file_path if dep_file is None else dep_file)
 
-            elif line.startswith('-f') or line.startswith('--find-links') or \
-                line.startswith('--no-index') or \
-                line.startswith('--allow-external') or \
-                line.startswith('--allow-unverified') or \
-                line.startswith('-Z') or \
-                    line.startswith('--always-unzip'):
+            elif kind == lexer.OPTION:
                 continue
-            elif self.is_marked_line(line):
+            elif self.is_marked_line(line.split("\n", 1)[0]):
                 continue
             else:
-                try:
-
-                    parseable_line = line
-
-                    # multiline requirements are not parseable
-                    if "\\" in line:
-                        parseable_line = line.replace("\\", "")
-                        for next_line in self.iter_lines(num + 1):
-                            parseable_line += next_line.strip().replace("\\",
-                                                                        "")
-                            line += "\n" + next_line
-                            if "\\" in next_line:
-                                continue
-                            break
-                        # ignore multiline requirements if they are marked
-                        if self.is_marked_line(parseable_line):
-                            continue
-
-                    hashes = []
-                    if "--hash" in parseable_line:
-                        parseable_line, hashes = Parser.parse_hashes(
-                            parseable_line)
-
-                    req = RequirementsTXTLineParser.parse(parseable_line)
-                    if req:
-                        req.hashes = hashes
-                        req.index_server = index_server
-                        # replace the requirements line with the 'real' line
-                        req.line = line
-                        self.obj.dependencies.append(req)
-                except ValueError:
+                parseable_line = token.parseable_line
+                # ignore multiline requirements if they are marked
+                if token.end > token.start and \
+                        self.is_marked_line(parseable_line):
                     continue
 
+                hashes = []
+                if "--hash" in parseable_line:
+                    parseable_line, hashes = Parser.parse_hashes(
+                        parseable_line)
+
+                req = RequirementsTXTLineParser.parse_logical_line(
+                    parseable_line)
+                if req:
+                    req.hashes = hashes
+                    req.index_server = index_server
+                    # replace the requirements line with the 'real' line
+                    req.line = line
+                    req.line_numbers = (token.start, token.end)
+                    starts = self.line_starts
+                    if starts is not None:
+                        last_line = line.rsplit("\n", 1)[-1]
+                        req.offsets = (starts[token.start],
+                                       starts[token.end] + len(last_line))
+                    yield req
+
+        for index, req_file_path, result in pending:
+            dep_file = result()
+            if dep_file is not None:
+                self.obj.resolved_files[index] = dep_file
+
 
 class ToxINIParser(Parser):
     """
 
     """
 
-    def parse(self):
+    line_prefix_pattern = INI_LINE_PREFIX_PATTERN
+
+    def iter_dependencies(self):
         """
 
         :return:
         """
+        from configparser import ConfigParser, NoOptionError
+
         parser = ConfigParser()
-        parser.read_string(self.obj.content)
+        parser.read_string(self.content)
         for section in parser.sections():
             try:
                 content = parser.get(section=section, option="deps")
@@ -314,7 +577,8 @@ class ToxINIParser(Parser):
                         req = RequirementsTXTLineParser.parse(line)
                         if req:
                             req.dependency_type = self.obj.file_type
-                            self.obj.dependencies.append(req)
+                            self.locate(req)
+                            yield req
             except NoOptionError:
                 pass
 
@@ -324,14 +588,16 @@ class CondaYMLParser(Parser):
 
     """
 
-    def parse(self):
+    line_prefix_pattern = YAML_LINE_PREFIX_PATTERN
+
+    def iter_dependencies(self):
         """
 
         :return:
         """
         import yaml
         try:
-            data = yaml.safe_load(self.obj.content)
+            data = yaml.safe_load(self.content)
             if data and 'dependencies' in data and \
                     isinstance(data['dependencies'], list):
                 for dep in data['dependencies']:
@@ -342,20 +608,22 @@ class CondaYMLParser(Parser):
                             req = RequirementsTXTLineParser.parse(line)
                             if req:
                                 req.dependency_type = self.obj.file_type
-                                self.obj.dependencies.append(req)
+                                self.locate(req)
+                                yield req
         except yaml.YAMLError:
             pass
 
 
 class PipfileParser(Parser):
 
-    def parse(self):
+    def iter_dependencies(self):
         """
         Parse a Pipfile (as seen in pipenv)
         :return:
         """
+        tomllib = _tomllib()
         try:
-            data = tomllib.loads(self.obj.content)
+            data = tomllib.loads(self.content)
             if data:
                 for package_type in ['packages', 'dev-packages']:
                     if package_type in data:
@@ -365,13 +633,11 @@ class PipfileParser(Parser):
                                 continue
                             if specs == '*':
                                 specs = ''
-                            self.obj.dependencies.append(
-                                Dependency(
-                                    name=name, specs=SpecifierSet(specs),
-                                    dependency_type=filetypes.pipfile,
-                                    line=''.join([name, specs]),
-                                    sections=[package_type]
-                                )
+                            yield Dependency(
+                                name=name, specs=check_specifiers(specs),
+                                dependency_type=filetypes.pipfile,
+                                line=''.join([name, specs]),
+                                sections=[package_type]
                             )
         except (tomllib.TOMLDecodeError, IndexError):
             pass
@@ -379,13 +645,16 @@ class PipfileParser(Parser):
 
 class PipfileLockParser(Parser):
 
-    def parse(self):
+    #: attach the hashes of every package to its dependency
+    include_hashes = True
+
+    def iter_dependencies(self):
         """
         Parse a Pipfile.lock (as seen in pipenv)
         :return:
         """
         try:
-            data = json.loads(self.obj.content, object_pairs_hook=OrderedDict)
+            data = load_json(self.content)
             if data:
                 for package_type in ['default', 'develop']:
                     if package_type in data:
@@ -393,35 +662,47 @@ class PipfileLockParser(Parser):
                             # skip VCS dependencies
                             if 'version' not in meta:
                                 continue
-                            specs = meta['version']
-                            hashes = meta['hashes']
-                            self.obj.dependencies.append(
-                                Dependency(
-                                    name=name, specs=SpecifierSet(specs),
-                                    dependency_type=filetypes.pipfile_lock,
-                                    hashes=hashes,
-                                    line=''.join([name, specs]),
-                                    sections=[package_type]
-                                )
+                            specs = check_specifiers(meta['version'])
+                            hashes = meta['hashes'] \
+                                if self.include_hashes else ()
+                            yield Dependency(
+                                name=name, specs=specs,
+                                dependency_type=filetypes.pipfile_lock,
+                                hashes=hashes,
+                                line=''.join([name, specs]),
+                                sections=[package_type]
                             )
         except ValueError as e:
             raise MalformedDependencyFileError(info=str(e))
 
 
+class FastPipfileLockParser(PipfileLockParser):
+    """
+    A Pipfile.lock parser for callers that only need names and versions, the
+    hashes are left out.
+    """
+
+    include_hashes = False
+
+
 class SetupCfgParser(Parser):
-    def parse(self):
+    line_prefix_pattern = INI_LINE_PREFIX_PATTERN
+
+    def iter_dependencies(self):
+        from configparser import ConfigParser
+
         parser = ConfigParser()
-        parser.read_string(self.obj.content)
+        parser.read_string(self.content)
         for section in parser.sections():
-            if section.name == 'options':
+            if section == 'options':
                 options = 'install_requires', 'setup_requires', 'test_require'
                 for name in options:
                     if parser.has_option('options', name):
-                        content = section.get('options', name)
-                        self._parse_content(content)
+                        content = parser.get('options', name)
+                        yield from self._parse_content(content)
             elif section == 'options.extras_require':
                 for _, content in parser.items('options.extras_require'):
-                    self._parse_content(content)
+                    yield from self._parse_content(content)
 
     def _parse_content(self, content):
         for n, line in enumerate(content.splitlines()):
@@ -431,15 +712,69 @@ class SetupCfgParser(Parser):
                 req = RequirementsTXTLineParser.parse(line)
                 if req:
                     req.dependency_type = self.obj.file_type
-                    self.obj.dependencies.append(req)
+                    self.locate(req)
+                    yield req
 
 
 class PoetryLockParser(Parser):
+    """
+    Reads poetry.lock files as TOML, without importing poetry. The
+    python-versions, optional and source fields of every package end up in
+    Dependency.meta, the hashes of its files in Dependency.hashes.
+    """
 
-    def parse(self):
+    #: load the lock file with poetry's Locker first, when poetry is
+    #: installed; slow, since poetry and a whole locked repository are
+    #: loaded
+    use_poetry = False
+
+    #: package fields copied into Dependency.meta
+    meta_keys = ("python-versions", "optional", "source")
+
+    def iter_dependencies(self):
         """
         Parse a poetry.lock
         """
+        if self.use_poetry:
+            dependencies = self._poetry_dependencies()
+            if dependencies is not None:
+                yield from dependencies
+                return
+
+        from packaging.version import Version
+
+        try:
+            data = _tomllib().loads(self.content)
+            pkg_key = 'package'
+            if data:
+                dependencies = data[pkg_key]
+                # lock files before 2.0 list the files of every package
+                # under metadata.files instead of in the package
+                files = data.get('metadata', {}).get('files', {})
+                for dep in dependencies:
+                    name = dep['name']
+                    spec = "=={version}".format(
+                        version=Version(dep['version']))
+                    sections = [dep['category']] if "category" in dep else []
+                    package_files = dep.get('files')
+                    if package_files is None:
+                        package_files = files.get(name, ())
+                    meta = {key: dep[key] for key in self.meta_keys
+                            if key in dep}
+                    yield Dependency(
+                        name=name, specs=spec,
+                        dependency_type=filetypes.poetry_lock,
+                        line=''.join([name, spec]),
+                        sections=sections,
+                        meta=meta or None,
+                        hashes=tuple(f['hash'] for f in package_files
+                                     if 'hash' in f)
+                    )
+        except Exception as e:
+            raise MalformedDependencyFileError(info=str(e))
+
+    def _poetry_dependencies(self):
+        # None when poetry is missing or can't load the file
         try:
             from poetry.packages.locker import Locker
             from pathlib import Path
@@ -447,47 +782,43 @@ class PoetryLockParser(Parser):
             lock_path = Path(self.obj.path)
 
             repository = Locker(lock_path, {}).locked_repository()
-            for pkg in repository.packages:
-                self.obj.dependencies.append(
-                    Dependency(
-                        name=pkg.name, specs=SpecifierSet(f"=={pkg.version.text}"),
-                        dependency_type=filetypes.poetry_lock,
-                        line=pkg.to_dependency().to_pep_508(),
-                        sections=list(pkg.dependency_group_names())
-                    )
+            # build everything first, a failure halfway through falls back
+            # to the TOML parser
+            return [
+                Dependency(
+                    name=pkg.name, specs=f"=={pkg.version.text}",
+                    dependency_type=filetypes.poetry_lock,
+                    line=pkg.to_dependency().to_pep_508(),
+                    sections=list(pkg.dependency_group_names())
                 )
+                for pkg in repository.packages
+            ]
         except Exception:
-            try:
-                data = tomllib.loads(self.obj.content)
-                pkg_key = 'package'
-                if data:
-                    dependencies = data[pkg_key]
-                    for dep in dependencies:
-                        name = dep['name']
-                        spec = "=={version}".format(
-                            version=Version(dep['version']))
-                        sections = [dep['category']] if "category" in dep else []
-                        self.obj.dependencies.append(
-                            Dependency(
-                                name=name, specs=SpecifierSet(spec),
-                                dependency_type=filetypes.poetry_lock,
-                                line=''.join([name, spec]),
-                                sections=sections
-                            )
-                        )
-            except Exception as e:
-                raise MalformedDependencyFileError(info=str(e))
+            return None
+
+
+class PoetryLockerParser(PoetryLockParser):
+    """
+    A poetry.lock parser going through poetry's Locker when poetry is
+    installed, falling back to the TOML parser otherwise.
+    """
+
+    use_poetry = True
 
 
 class PyprojectTomlParser(Parser):
-    def parse(self) -> None:
+    line_prefix_pattern = TOML_LINE_PREFIX_PATTERN
+    line_suffix_pattern = TOML_LINE_SUFFIX_PATTERN
+
+    def iter_dependencies(self) -> Iterator[Dependency]:
         """Parse a pyproject.toml file.
 
         Refer to https://setuptools.pypa.io/en/latest/userguide/pyproject_config.html
         for configuration specification.
         """
+        tomllib = _tomllib()
         try:
-            cfg = tomllib.loads(self.obj.content)
+            cfg = tomllib.loads(self.content)
         except (tomllib.TOMLDecodeError, IndexError) as e:
             raise MalformedDependencyFileError(info=str(e))
 
@@ -505,11 +836,12 @@ class PyprojectTomlParser(Parser):
                 if req:
                     req.dependency_type = self.obj.file_type
                     req.section = section
-                    self.obj.dependencies.append(req)
+                    self.locate(req)
+                    yield req
 
 
 def parse(content, file_type=None, path=None, sha=None, marker=((), ()),
-          parser=None, resolve=False):
+          parser=None, resolve=False, cache=None, resolver=None):
     """
 
     :param content:
@@ -518,6 +850,8 @@ def parse(content, file_type=None, path=None, sha=None, marker=((), ()),
     :param sha:
     :param marker:
     :param parser:
+    :param cache: optional dparse.cache.ParseCache
+    :param resolver: optional dparse.resolver.IncludeResolver
     :return:
     """
 
@@ -528,7 +862,166 @@ def parse(content, file_type=None, path=None, sha=None, marker=((), ()),
         marker=marker,
         file_type=file_type,
         parser=parser,
-        resolve=resolve
+        resolve=resolve,
+        cache=cache,
+        resolver=resolver
     )
 
     return dep_file.parse()
+
+
+# files larger than this are memory-mapped instead of read into bytes first
+MMAP_THRESHOLD = 1024 * 1024
+
+
+def decode(data):
+    """
+    Decodes the content of a dependency file. UTF-8 and UTF-16 byte order
+    marks are honored, everything else is read as UTF-8. Anything
+    supporting the buffer protocol (bytes, memoryview, mmap) is decoded in
+    place, without copying it into a bytes object first.
+
+    :param data: bytes-like object
+    :return: str
+    """
+    view = memoryview(data)
+    try:
+        if view[:3] == codecs.BOM_UTF8:
+            return str(view[3:], "utf-8")
+        if view[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+            return str(view, "utf-16")
+        return str(view, "utf-8")
+    except UnicodeDecodeError as e:
+        raise MalformedDependencyFileError(info=str(e))
+    finally:
+        view.release()
+
+
+def read_file(path):
+    """
+    Reads and decodes a dependency file, memory-mapping large files.
+
+    :param path: str or os.PathLike
+    :return: str
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            return decode(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return decode(m)
+
+
+def parse_path(path, file_type=None, **kwargs):
+    """
+    Reads and parses the file at path. Unless file_type is given, the file
+    type is inferred from the path.
+
+    :param path: str or os.PathLike
+    :param file_type:
+    :param kwargs: passed to parse()
+    :return: DependencyFile
+    """
+    path = os.fspath(path)
+    return parse(read_file(path), file_type=file_type, path=path, **kwargs)
+
+
+def parse_bytes(data, file_type=None, path=None, **kwargs):
+    """
+    Decodes and parses bytes, a memoryview or an mmap. Unless file_type is
+    given, the file type is inferred from the path.
+
+    :param data: bytes-like object
+    :param file_type:
+    :param path:
+    :param kwargs: passed to parse()
+    :return: DependencyFile
+    """
+    return parse(decode(data), file_type=file_type, path=path, **kwargs)
+
+
+ParseResult = namedtuple(
+    "ParseResult", ["index", "path", "dependency_file", "error"]
+)
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _parse_chunk(chunk, kwargs):
+    results = []
+    for index, (content, path, file_type) in chunk:
+        try:
+            if content is None:
+                content = read_file(path)
+            dep_file = parse(content, file_type=file_type, path=path, **kwargs)
+            results.append(ParseResult(index, path, dep_file, None))
+        except Exception as e:
+            # e.g. configparser errors of a broken tox.ini, one file must
+            # not take the rest of the batch down
+            results.append(ParseResult(index, path, None, e))
+    return results
+
+
+def parse_many(files, executor="thread", max_workers=None, chunksize=1,
+               ordered=False, **kwargs):
+    """
+    Parses many files on a pool, yielding a ParseResult as each file is
+    done. Unreadable, malformed and unknown files, and any other error
+    raised for a file, are reported through ParseResult.error instead of
+    aborting the batch.
+
+    :param files: iterable of (content, path, file_type) tuples, files
+        with None as content are read from path by the workers
+    :param executor: "thread", "process" or a concurrent.futures.Executor,
+        which is left running so it can be reused between batches
+    :param max_workers: pool size when the pool is created here
+    :param chunksize: number of files sent to a worker at once, raise it to
+        cut down on per-task overhead with process pools
+    :param ordered: yield results in input order
+    :param kwargs: passed to parse(), e.g. marker or resolve; they must be
+        picklable when running on a process pool
+    :return: generator of ParseResult
+    """
+    from concurrent.futures import Executor, ThreadPoolExecutor, \
+        ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    if isinstance(executor, Executor):
+        pool, owned = executor, False
+    elif executor == "thread":
+        pool, owned = ThreadPoolExecutor(max_workers=max_workers), True
+    elif executor == "process":
+        pool, owned = ProcessPoolExecutor(max_workers=max_workers), True
+    else:
+        raise ValueError("Unknown executor {!r}".format(executor))
+
+    chunks = _chunked(enumerate(files), chunksize)
+    # keep a bounded number of chunks in flight so huge inputs are not
+    # materialized at once
+    window = max(2, 2 * (max_workers or os.cpu_count() or 1))
+    pending = deque()
+    try:
+        for chunk in islice(chunks, window):
+            pending.append(pool.submit(_parse_chunk, chunk, kwargs))
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pending.remove(future)
+            for future in done:
+                for chunk in islice(chunks, 1):
+                    pending.append(pool.submit(_parse_chunk, chunk, kwargs))
+                yield from future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            pool.shutdown(wait=True)
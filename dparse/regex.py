@@ -1 +1,38 @@
+import re
+
 HASH_REGEX = r"--hash[=| ]\w+:\w+"
+
+# split() on the capturing group returns the text around the hashes at even
+# indexes and the hashes at odd ones, in a single scan
+HASH_SPLIT_PATTERN = re.compile("(" + HASH_REGEX + ")")
+
+INDEX_SERVER_SPLIT_PATTERN = re.compile(r"[=\s]+")
+
+# what may surround a located dependency on its physical line, checked with
+# match() on the text before and after it: nothing but whitespace by default,
+# an ini option name, a yaml list dash or toml string quotes otherwise
+LINE_PREFIX_PATTERN = re.compile(r"\s*$")
+LINE_SUFFIX_PATTERN = re.compile(r"\s*$")
+INI_LINE_PREFIX_PATTERN = re.compile(r"\s*(?:[^#;\s][^=#;]*=\s*)?$")
+YAML_LINE_PREFIX_PATTERN = re.compile(r"\s*(?:-\s+)?$")
+TOML_LINE_PREFIX_PATTERN = re.compile(r"\s*[\"']$")
+TOML_LINE_SUFFIX_PATTERN = re.compile(r"[\"']\s*,?\s*(?:#.*)?$")
+
+# one clause of a PEP 440 specifier set, as packaging's Specifier accepts
+# it; checked on the raw strings of lock files, whose SpecifierSet is only
+# built on first access
+_RELEASE = r"v?(?:[0-9]+!)?[0-9]+(?:\.[0-9]+)*"
+_PRE = r"(?:[-_.]?(?:alpha|beta|preview|pre|a|b|c|rc)[-_.]?[0-9]*)?"
+_POST = r"(?:-[0-9]+|[-_.]?(?:post|rev|r)[-_.]?[0-9]*)?"
+_DEV = r"(?:[-_.]?dev[-_.]?[0-9]*)?"
+_LOCAL = r"(?:\+[a-z0-9]+(?:[-_.][a-z0-9]+)*)?"
+SPECIFIER_PATTERN = re.compile(
+    r"\s*(?:"
+    r"===\s*[^\s;)]*"
+    r"|(?:==|!=)\s*" + _RELEASE + r"(?:\.\*|" + _PRE + _POST + _DEV +
+    _LOCAL + r")"
+    r"|~=\s*v?(?:[0-9]+!)?[0-9]+(?:\.[0-9]+)+" + _PRE + _POST + _DEV +
+    r"|(?:<=|>=|<|>)\s*" + _RELEASE + _PRE + _POST + _DEV +
+    r")\s*",
+    re.IGNORECASE
+)
@@ -0,0 +1,194 @@
+"""
+Maps file types and file names to parser and updater classes.
+
+Third parties add formats with register(), either directly or from a
+callable exposed in the ``dparse.file_types`` entry point group. Those
+callables are run once, by load_plugins() or on the first lookup the
+registered types do not answer; looking up the built-in types never pays
+for scanning the installed distributions.
+"""
+
+import importlib
+import os
+import threading
+import warnings
+from collections import namedtuple
+
+from . import filetypes
+
+ENTRY_POINT_GROUP = "dparse.file_types"
+
+FileType = namedtuple(
+    "FileType", ["name", "parser", "updater", "basenames", "suffixes"]
+)
+FileType.__doc__ = """
+:param name: the file type, as passed to parse()
+:param parser: parser class, or a "module:attribute" reference to it
+:param updater: updater class, a reference to it, or None
+:param basenames: file names of this type
+:param suffixes: file name suffixes of this type
+"""
+
+_file_types = {}
+# exact file name -> file type name
+_basenames = {}
+# extension, with its dot -> file type name
+_extensions = {}
+# suffixes that are not a plain extension, checked with endswith
+_suffixes = []
+_lock = threading.RLock()
+_plugins_loaded = False
+
+
+def register(name, parser, updater=None, basenames=(), suffixes=()):
+    """
+    Registers a file type, replacing any file type of the same name.
+
+    :param name: the file type
+    :param parser: Parser subclass, or a "module:attribute" reference
+    :param updater: updater class, a "module:attribute" reference or None
+    :param basenames: file names of this type, e.g. ("Pipfile",)
+    :param suffixes: file name suffixes of this type, e.g. (".txt",)
+    """
+    with _lock:
+        _file_types[name] = FileType(name, parser, updater, tuple(basenames),
+                                     tuple(suffixes))
+        for basename in basenames:
+            _basenames[basename] = name
+        for suffix in suffixes:
+            if os.path.splitext("x" + suffix)[1] == suffix:
+                _extensions[suffix] = name
+            else:
+                _suffixes.append((suffix, name))
+
+
+def _resolve(reference):
+    if isinstance(reference, str):
+        module, _, attribute = reference.partition(":")
+        return getattr(importlib.import_module(module), attribute)
+    return reference
+
+
+def load_plugins():
+    """
+    Runs the registration callables of the dparse.file_types entry point
+    group, once. A plugin that fails to load is reported with a warning.
+    """
+    global _plugins_loaded
+    with _lock:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+        try:
+            from importlib.metadata import entry_points
+        except ImportError:  # pragma: no cover
+            return
+        entries = entry_points()
+        if hasattr(entries, "select"):
+            entries = entries.select(group=ENTRY_POINT_GROUP)
+        else:  # pragma: no cover
+            entries = entries.get(ENTRY_POINT_GROUP, ())
+        for entry in entries:
+            try:
+                entry.load()()
+            except Exception as e:
+                warnings.warn("Could not load dparse plugin {}: {!r}".format(
+                    entry.name, e))
+
+
+def get(name):
+    """
+    Returns the registered FileType with its classes imported, or None.
+
+    :param name: the file type
+    :return: FileType or None
+    """
+    file_type = _file_types.get(name)
+    if file_type is None and not _plugins_loaded:
+        load_plugins()
+        file_type = _file_types.get(name)
+    if file_type is None:
+        return None
+    if isinstance(file_type.parser, str) or \
+            isinstance(file_type.updater, str):
+        resolved = file_type._replace(parser=_resolve(file_type.parser),
+                                      updater=_resolve(file_type.updater))
+        with _lock:
+            # unless it was registered again in the meantime
+            if _file_types.get(name) is file_type:
+                _file_types[name] = resolved
+        file_type = resolved
+    return file_type
+
+
+def _detect(path):
+    basename = os.path.basename(path)
+    name = _basenames.get(basename)
+    if name is None:
+        name = _extensions.get(os.path.splitext(basename)[1])
+    if name is None:
+        for suffix, suffix_name in _suffixes:
+            if path.endswith(suffix):
+                return suffix_name
+    return name
+
+
+def detect(path):
+    """
+    Returns the name of the file type of path: an exact file name match
+    first, then the file extension, then any other registered suffix.
+
+    :param path: str
+    :return: str or None
+    """
+    name = _detect(path)
+    if name is None and not _plugins_loaded:
+        load_plugins()
+        name = _detect(path)
+    return name
+
+
+def parser_for(file_type=None, path=None):
+    """
+    Returns the parser class for file_type or, without one, for path.
+
+    :param file_type:
+    :param path:
+    :return: Parser subclass or None
+    """
+    if file_type is None and path is not None:
+        file_type = detect(path)
+    entry = get(file_type) if file_type is not None else None
+    return entry.parser if entry is not None else None
+
+
+def updater_for(file_type=None, path=None):
+    """
+    Returns the updater class for file_type or, without one, for path.
+
+    :param file_type:
+    :param path:
+    :return: updater class or None
+    """
+    if file_type is None and path is not None:
+        file_type = detect(path)
+    entry = get(file_type) if file_type is not None else None
+    return entry.updater if entry is not None else None
+
+
+register(filetypes.requirements_txt, "dparse.parser:RequirementsTXTParser",
+         "dparse.updater:RequirementsTXTUpdater", suffixes=(".txt", ".in"))
+register(filetypes.conda_yml, "dparse.parser:CondaYMLParser",
+         "dparse.updater:CondaYMLUpdater", suffixes=(".yml",))
+register(filetypes.tox_ini, "dparse.parser:ToxINIParser",
+         "dparse.updater:ToxINIUpdater", suffixes=(".ini",))
+register(filetypes.pipfile, "dparse.parser:PipfileParser",
+         "dparse.updater:PipfileUpdater", basenames=("Pipfile",))
+register(filetypes.pipfile_lock, "dparse.parser:PipfileLockParser",
+         "dparse.updater:PipfileLockUpdater", basenames=("Pipfile.lock",))
+register(filetypes.setup_cfg, "dparse.parser:SetupCfgParser",
+         "dparse.updater:SetupCFGUpdater", basenames=("setup.cfg",))
+register(filetypes.poetry_lock, "dparse.parser:PoetryLockParser",
+         basenames=("poetry.lock",))
+register(filetypes.pyproject_toml, "dparse.parser:PyprojectTomlParser",
+         basenames=("pyproject.toml",))
@@ -0,0 +1,165 @@
+import os
+import threading
+
+
+class IncludeResolver:
+    """
+    Resolves the files included with -r / --requirement. A resolver can be
+    shared between many DependencyFile parses: every included file is read
+    and parsed once, and parsed again only when its mtime or size changes.
+
+    Include cycles are detected, the include that closes a cycle is left
+    as an unresolved path and recorded in `cycles`.
+
+    With an executor, the includes of a file are read and parsed at the
+    same time, so the wall time depends on the depth of the include tree
+    rather than on its size. resolved_files keeps the source order.
+    """
+
+    def __init__(self, executor=None):
+        """
+
+        :param executor: optional concurrent.futures.ThreadPoolExecutor to
+                         resolve sibling includes on, it is not shut down
+                         by the resolver
+        """
+        self.executor = executor
+        # normalized path -> ((mtime_ns, size), DependencyFile)
+        self._files = {}
+        self._lock = threading.Lock()
+        #: normalized path -> normalized paths it includes, in source order
+        self.graph = {}
+        #: tuples of normalized paths, each ending with the path that
+        #: closed the cycle
+        self.cycles = []
+
+    @staticmethod
+    def normalize(path):
+        """
+
+        :param path:
+        :return: str
+        """
+        return os.path.normcase(os.path.abspath(path))
+
+    def chain_of(self, dependency_file):
+        """
+        The normalized paths leading from the top-level file to
+        dependency_file, dependency_file included.
+
+        :param dependency_file:
+        :return: tuple
+        """
+        return dependency_file.include_chain or (
+            self.normalize(dependency_file.path),)
+
+    @staticmethod
+    def _version(path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _is_fresh(self, key, seen=None):
+        # a cached file is only fresh if none of the files it includes,
+        # directly or not, changed either
+        seen = set() if seen is None else seen
+        if key in seen:
+            return True
+        seen.add(key)
+        with self._lock:
+            cached = self._files.get(key)
+            children = list(self.graph.get(key, ()))
+        if cached is None or cached[0] != self._version(key):
+            return False
+        return all(self._is_fresh(child, seen) for child in children
+                   if child in self._files)
+
+    def _add_edge(self, parent, child):
+        with self._lock:
+            children = self.graph.setdefault(parent, [])
+            if child not in children:
+                children.append(child)
+
+    def resolve(self, path, parent):
+        """
+        Returns the parsed DependencyFile for path, included by parent, or
+        None if the include closes a cycle.
+
+        :param path: path of the included file
+        :param parent: the including DependencyFile
+        :return: DependencyFile or None
+        """
+        from .dependencies import DependencyFile
+        from .parser import read_file
+
+        key = self.normalize(path)
+        chain = self.chain_of(parent)
+        self._add_edge(chain[-1], key)
+
+        if key in chain:
+            with self._lock:
+                self.cycles.append(chain[chain.index(key):] + (key,))
+            return None
+
+        with self._lock:
+            cached = self._files.get(key)
+        if cached is not None and self._is_fresh(key):
+            return cached[1]
+
+        with self._lock:
+            # the includes are recorded again while parsing
+            self.graph[key] = []
+        # taken before reading, a change while parsing is picked up next time
+        version = self._version(path)
+        dep_file = DependencyFile(
+            content=read_file(path),
+            path=path,
+            resolve=True,
+            resolver=self
+        )
+        dep_file.include_chain = chain + (key,)
+        dep_file.parse()
+
+        with self._lock:
+            self._files[key] = (version, dep_file)
+        return dep_file
+
+    def submit(self, path, parent):
+        """
+        Starts resolving path on the executor.
+
+        :param path: path of the included file
+        :param parent: the including DependencyFile
+        :return: a callable returning the result of resolve()
+        """
+        future = self.executor.submit(self.resolve, path, parent)
+
+        def result():
+            # a parent waiting on a worker thread for an include that has
+            # not started yet runs it itself, otherwise deep trees would
+            # block every worker on includes queued behind them
+            if future.cancel():
+                return self.resolve(path, parent)
+            return future.result()
+        return result
+
+    def __getstate__(self):
+        # parsed files reference their resolver, they are pickled to return
+        # them from a process pool; the lock and executor can't be, and the
+        # cache of parsed files is left behind
+        state = self.__dict__.copy()
+        state.update(executor=None, _files={})
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self.graph.clear()
+            del self.cycles[:]
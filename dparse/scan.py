@@ -0,0 +1,97 @@
+"""Finding and parsing every dependency file below a directory."""
+
+import os
+
+from . import filetypes, registry
+from .parser import parse_many
+
+#: directories that are never descended into
+EXCLUDED_DIRS = frozenset((
+    ".git", ".hg", ".svn", ".tox", ".nox", ".venv", "venv", ".eggs",
+    "node_modules", "__pycache__", ".mypy_cache", ".pytest_cache",
+    "site-packages",
+))
+
+CONDA_SUFFIXES = (".yml", ".yaml")
+
+
+def classify(path):
+    """
+    Returns the file type of the dependency file at path, or None if it is
+    not one. Unlike the path detection of DependencyFile, only .txt and .in
+    files named like requirement or constraint files, or living in a
+    requirements directory, are taken for requirements files, only tox.ini
+    for tox files and only environment*.yml and conda*.yml for conda files.
+
+    :param path: str
+    :return: str or None
+    """
+    directory, name = os.path.split(path)
+    lower = name.lower()
+    if lower.endswith(CONDA_SUFFIXES):
+        if lower.startswith(("environment", "conda")):
+            return filetypes.conda_yml
+        return None
+    file_type = registry.detect(path)
+    if file_type == filetypes.requirements_txt:
+        if "requirements" not in lower and "constraints" not in lower and \
+                os.path.basename(directory).lower() != "requirements":
+            return None
+    elif file_type == filetypes.tox_ini and name != "tox.ini":
+        return None
+    return file_type
+
+
+def walk(root, exclude=EXCLUDED_DIRS):
+    """
+    Walks the tree below root with os.scandir, yielding (path, file_type)
+    for every dependency file as it is found. Symlinked directories are
+    not followed.
+
+    :param root: str or os.PathLike
+    :param exclude: names of the directories to skip
+    :return: generator of (str, str) tuples
+    """
+    stack = [os.fspath(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        subdirectories = []
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in exclude:
+                            subdirectories.append(entry.path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                file_type = classify(entry.path)
+                if file_type is not None:
+                    yield entry.path, file_type
+        # visit subdirectories in name order, depth first
+        stack.extend(sorted(subdirectories, reverse=True))
+
+
+def scan_tree(root, exclude=EXCLUDED_DIRS, **kwargs):
+    """
+    Finds and parses every dependency file below root. Files are read and
+    parsed on a pool while the tree is still being walked, and a
+    ParseResult is yielded as each file is done; unreadable, malformed and
+    unknown files are reported through ParseResult.error.
+
+    :param root: str or os.PathLike
+    :param exclude: names of the directories to skip
+    :param kwargs: passed to parse_many(), e.g. executor, max_workers,
+        ordered, or to parse(), e.g. resolve or cache
+    :return: generator of ParseResult
+    """
+    return parse_many(
+        ((None, path, file_type) for path, file_type in walk(root, exclude)),
+        **kwargs
+    )
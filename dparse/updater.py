@@ -1,13 +1,13 @@
 import re
 import json
-import tempfile
-import os
-import sys
 
-if sys.version_info >= (3, 11):
-    import tomllib
-else:
-    import tomli as tomllib
+
+def _expand(updates):
+    # fill in the defaults of update() for tuples leaving out spec or hashes
+    for dependency, version, *rest in updates:
+        spec = rest[0] if len(rest) > 0 else "=="
+        hashes = rest[1] if len(rest) > 1 else ()
+        yield dependency, version, spec, hashes
 
 
 class RequirementsTXTUpdater:
@@ -21,6 +21,76 @@ class RequirementsTXTUpdater:
         :param content: str, content
         :return: str, updated content
         """
+        return cls.update_many(content, [(dependency, version, spec, hashes)])
+
+    @classmethod
+    def update_many(cls, content, updates):
+        """
+        Updates several requirements at once. Dependencies whose offsets
+        still point at their line are spliced in place, the others are
+        found with a single regex scan of the content.
+        :param content: str, content
+        :param updates: iterable of (dependency, version, spec, hashes)
+                        tuples, spec and hashes may be left out
+        :return: str, updated content
+        """
+        spans = []
+        new_lines = {}
+        for dependency, version, spec, hashes in _expand(updates):
+            new_line = cls.new_line(dependency, version, spec, hashes)
+            if cls._has_valid_offsets(content, dependency):
+                spans.append((tuple(dependency.offsets), new_line))
+            else:
+                new_lines[dependency.line] = new_line
+
+        if spans:
+            content = cls._splice(content, spans)
+        if not new_lines:
+            return content
+
+        # longest first, so a line that is a prefix of another one is tried
+        # last
+        pattern = "|".join(
+            re.escape(line) for line in
+            sorted(new_lines, key=len, reverse=True))
+        regex = cls.SUB_REGEX.format("(?:" + pattern + ")")
+
+        return re.sub(regex, lambda match: new_lines[match.group(0)],
+                      content, flags=re.MULTILINE)
+
+    @classmethod
+    def _has_valid_offsets(cls, content, dependency):
+        # the offsets are only trusted while they still point at the line,
+        # otherwise the content changed since it was parsed
+        offsets = getattr(dependency, "offsets", None)
+        if not offsets:
+            return False
+        start, end = offsets
+        text = content[start:end]
+        return text == dependency.line or \
+            text.replace("\r\n", "\n") == dependency.line
+
+    @classmethod
+    def _splice(cls, content, spans):
+        parts = []
+        pos = 0
+        for (start, end), new_line in sorted(spans):
+            if start < pos:
+                # the same dependency was passed twice
+                continue
+            parts.append(content[pos:start])
+            parts.append(new_line)
+            pos = end
+        parts.append(content[pos:])
+        return "".join(parts)
+
+    @classmethod
+    def new_line(cls, dependency, version, spec="==", hashes=()):
+        """
+        Builds the line replacing dependency.line, keeping environment
+        markers and comments.
+        :return: str
+        """
         new_line = "{name}{spec}{version}".format(name=dependency.full_name,
                                                   spec=spec, version=version)
         appendix = ''
@@ -60,10 +130,7 @@ class RequirementsTXTUpdater:
                 if len(hashes) > n + 1:
                     new_line += " \\"
         new_line += appendix
-
-        regex = cls.SUB_REGEX.format(re.escape(dependency.line))
-
-        return re.sub(regex, new_line, content, flags=re.MULTILINE)
+        return new_line
 
 
 class CondaYMLUpdater(RequirementsTXTUpdater):
@@ -80,49 +147,97 @@ class SetupCFGUpdater(CondaYMLUpdater):
 
 
 class PipfileUpdater:
+    """
+    Updates Pipfiles in place, only the value of the updated packages is
+    rewritten so formatting and comments are kept.
+    """
+
+    SECTIONS = ('packages', 'dev-packages')
+    # tables and arrays of tables, e.g. [packages] and [[source]]
+    TABLE_REGEX = re.compile(r"^\s*(\[\[?)\s*([^\[\]]+?)\s*\]")
+    ENTRY_REGEX = re.compile(
+        r"""^(\s*)("[^"]+"|'[^']+'|[\w.-]+)(\s*=\s*)"""
+        r"""("[^"\r\n]*"|'[^'\r\n]*'|\{[^\r\n]*\})""")
+    VERSION_REGEX = re.compile(
+        r"""((?:^|[{,\s])version\s*=\s*)("[^"]*"|'[^']*')""")
+
     @classmethod
     def update(cls, content, dependency, version, spec="==", hashes=()):
-        data = tomllib.loads(content)
-        if data:
-            for package_type in ['packages', 'dev-packages']:
-                if package_type in data:
-                    if dependency.full_name in data[package_type]:
-                        data[package_type][
-                            dependency.full_name] = "{spec}{version}".format(
-                            spec=spec, version=version
-                        )
-        try:
-            from pipenv.project import Project
-        except ImportError:
-            raise ImportError(
-                "Updating a Pipfile requires the pipenv extra to be installed."
-                " Install it with pip install dparse[pipenv]")
-        pipfile = tempfile.NamedTemporaryFile(delete=False)
-        pipfile.close()
-        p = Project(chdir=False)
-        p.write_toml(data=data, path=pipfile.name)
-        data = open(pipfile.name).read()
-        os.remove(pipfile.name)
-        return data
+        return cls.update_many(content, [(dependency, version, spec, hashes)])
+
+    @classmethod
+    def update_many(cls, content, updates):
+        """
+        :param content: str, content
+        :param updates: iterable of (dependency, version, spec, hashes)
+                        tuples, spec and hashes may be left out
+        :return: str, updated content
+        """
+        new_values = {}
+        for dependency, version, spec, _ in _expand(updates):
+            new_values[dependency.full_name] = '"{spec}{version}"'.format(
+                spec=spec, version=version)
+        if not new_values:
+            return content
+
+        lines = content.splitlines(keepends=True)
+        in_packages = False
+        for n, line in enumerate(lines):
+            table = cls.TABLE_REGEX.match(line)
+            if table:
+                in_packages = table.group(1) == "[" and \
+                    table.group(2).strip("\"'") in cls.SECTIONS
+                continue
+            if not in_packages:
+                continue
+            entry = cls.ENTRY_REGEX.match(line)
+            if not entry:
+                continue
+            name = entry.group(2).strip("\"'")
+            if name not in new_values:
+                continue
+            value = entry.group(4)
+            if value.startswith("{"):
+                # inline tables keep everything but their version
+                new_value, found = cls.VERSION_REGEX.subn(
+                    lambda m: m.group(1) + new_values[name], value, count=1)
+                if not found:
+                    continue
+            else:
+                new_value = new_values[name]
+            lines[n] = line[:entry.start(4)] + new_value + \
+                line[entry.end(4):]
+        return "".join(lines)
 
 
 class PipfileLockUpdater:
     @classmethod
     def update(cls, content, dependency, version, spec="==", hashes=()):
+        return cls.update_many(content, [(dependency, version, spec, hashes)])
+
+    @classmethod
+    def update_many(cls, content, updates):
+        """
+        :param content: str, content
+        :param updates: iterable of (dependency, version, spec, hashes)
+                        tuples, spec and hashes may be left out
+        :return: str, updated content
+        """
         data = json.loads(content)
         if data:
-            for package_type in ['default', 'develop']:
-                if package_type in data:
-                    if dependency.full_name in data[package_type]:
-                        data[package_type][dependency.full_name] = {
-                            'hashes': [
-                                "{method}:{hash}".format(
-                                    hash=h['hash'],
-                                    method=h['method']
-                                ) for h in hashes
-                            ],
-                            'version': "{spec}{version}".format(
-                                spec=spec, version=version
-                            )
-                        }
+            for dependency, version, spec, hashes in _expand(updates):
+                for package_type in ['default', 'develop']:
+                    if package_type in data:
+                        if dependency.full_name in data[package_type]:
+                            data[package_type][dependency.full_name] = {
+                                'hashes': [
+                                    "{method}:{hash}".format(
+                                        hash=h['hash'],
+                                        method=h['method']
+                                    ) for h in hashes
+                                ],
+                                'version': "{spec}{version}".format(
+                                    spec=spec, version=version
+                                )
+                            }
         return json.dumps(data, indent=4, separators=(',', ': ')) + "\n"
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""Tests for `dparse.aio`"""
+
+import asyncio
+import configparser
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dparse import aparse, aparse_many, aparse_path, filetypes
+from dparse.errors import UnknownDependencyFileError
+
+
+def test_aparse():
+    dep_file = asyncio.run(aparse("django==1.11\n",
+                                  file_type=filetypes.requirements_txt))
+    assert [d.name for d in dep_file.dependencies] == ["django"]
+
+
+def test_aparse_path_resolves_includes(tmp_path):
+    (tmp_path / "base.txt").write_text("django\n")
+    (tmp_path / "dev.txt").write_text("-r base.txt\npytest\n")
+
+    dep_file = asyncio.run(aparse_path(tmp_path / "dev.txt", resolve=True))
+    assert [d.name for d in dep_file.resolved_dependencies] == \
+        ["pytest", "django"]
+
+
+def test_aparse_many():
+    files = [("pkg{}==1.0\n".format(n), "req{}.txt".format(n), None)
+             for n in range(20)]
+    files.insert(3, ("", "unknown.xyz", None))
+    files.append(("[tox\nfoo", "tox.ini", filetypes.tox_ini))
+
+    async def collect(**kwargs):
+        return [r async for r in aparse_many(files, **kwargs)]
+
+    results = asyncio.run(collect(limit=4, ordered=True))
+    assert [r.index for r in results] == list(range(22))
+    assert isinstance(results[3].error, UnknownDependencyFileError)
+    assert isinstance(results[21].error, configparser.Error)
+    assert results[4].dependency_file.dependencies[0].name == "pkg3"
+
+    results = asyncio.run(collect(limit=2))
+    assert sorted(r.index for r in results) == list(range(22))
+
+
+def test_aparse_many_limit_and_async_input():
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    class CountingParser:
+        def __init__(self, obj, resolve=False):
+            self.obj = obj
+            self.is_marked_file = False
+
+        def parse(self):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            threading.Event().wait(0.01)
+            with lock:
+                running[0] -= 1
+
+    async def files():
+        for n in range(12):
+            yield "", "file{}".format(n), None
+
+    async def collect():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return [r async for r in aparse_many(
+                files(), executor=executor, limit=3, parser=CountingParser)]
+
+    assert len(asyncio.run(collect())) == 12
+    assert peak[0] <= 3
+
+
+def test_aparse_many_cancellation():
+    started = []
+    release = threading.Event()
+
+    class BlockingParser:
+        def __init__(self, obj, resolve=False):
+            self.obj = obj
+            self.is_marked_file = False
+
+        def parse(self):
+            started.append(self.obj.path)
+            release.wait(5)
+
+    async def consume():
+        files = [("", "file{}".format(n), None) for n in range(10)]
+        async for _ in aparse_many(files, executor=executor, limit=2,
+                                   parser=BlockingParser):
+            pass
+
+    async def main():
+        task = asyncio.ensure_future(consume())
+        while len(started) < 2:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        try:
+            assert asyncio.run(main())
+        finally:
+            release.set()
+    # the files behind the limit were never started
+    assert len(started) == 2
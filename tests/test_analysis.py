@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Tests for `dparse.analysis`"""
+
+import itertools
+
+from packaging.specifiers import SpecifierSet
+from packaging.version import Version
+
+from dparse.analysis import match, matching_indexes, pinned_version
+from dparse.dependencies import Dependency
+from dparse.parser import RequirementsTXTLineParser
+
+
+def dep(line):
+    return RequirementsTXTLineParser.parse(line)
+
+
+def test_pinned_version():
+    expected = {
+        "django==1.11": "1.11",
+        "django == 1.11.0": "1.11.0",
+        "django===1.11": None,
+        "django==1.*": None,
+        "django>=1.11": None,
+        "django==1.11,!=1.11.1": None,
+        "django": None,
+    }
+    for line, version in expected.items():
+        assert pinned_version(dep(line)) == version, line
+
+
+VERSIONS = [
+    "0.9", "1.0.dev0", "1.0a1", "1.0", "1.0+local", "1.0.post1", "1.1rc1",
+    "1.1", "1.1.1", "1.4.5", "1.4.9", "1.5.0a1", "1.5", "2.0", "1!0.5",
+]
+
+SPECIFIERS = [
+    "", "<1.0", "<=1.0", ">1.0", ">=1.0", "==1.0", "==1.0+local", "!=1.0",
+    "==1.*", "!=1.*", "==1.4.*", "~=1.4.5", "~=1.1", ">=1.0,<1.5",
+    ">1.0a1,!=1.1", ">=1.1rc1", "===1.0", "<1.1,>1.4", ">=0.1,<1!0",
+]
+
+
+def test_matching_indexes_agree_with_contains():
+    versions = sorted(Version(v) for v in VERSIONS)
+    for spec, prereleases in itertools.product(SPECIFIERS,
+                                               (None, True, False)):
+        specifier_set = SpecifierSet(spec)
+        expected = [i for i, v in enumerate(versions)
+                    if specifier_set.contains(v, prereleases=prereleases)]
+        assert matching_indexes(specifier_set, versions, prereleases) == \
+            expected, (spec, prereleases)
+
+
+def test_match():
+    dependencies = [
+        dep("Django==1.11.2"), dep("django==1.11.2.0"), dep("django==2.2"),
+        dep("django>=1.0"), dep("flask==0.12"), dep("requests==2.0"),
+        Dependency("my_package", "==not-a-version", "my_package"),
+    ]
+    table = [
+        ("django", ">=1.11,<1.11.5", "CVE-1"),
+        ("Flask", SpecifierSet("<1.0"), "CVE-2"),
+        ("django", ">=3.0", "CVE-3"),
+        ("unknown", "<1", "CVE-4"),
+        ("DJANGO", "==2.2", "CVE-5"),
+        ("my-package", "", "CVE-6"),
+    ]
+
+    matches = match(dependencies, table)
+
+    assert [(m.index, m.dependency.line) for m in matches] == [
+        (0, "Django==1.11.2"), (0, "django==1.11.2.0"),
+        (1, "flask==0.12"),
+        (4, "django==2.2"),
+    ]
+    assert matches[0].key == "django"
+    assert matches[0].version == Version("1.11.2")
+    assert matches[2].specifier == SpecifierSet("<1.0")
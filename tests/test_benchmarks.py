@@ -0,0 +1,29 @@
+#!/usr/bin/env python
+"""Smoke tests for the benchmark suite in `benchmarks`"""
+
+from benchmarks import fixtures, suite
+from dparse import parse
+
+
+def test_fixtures_have_the_requested_size():
+    for file_type, fixture in suite.PARSE_CASES:
+        try:
+            dep_file = parse(fixture(7), file_type=file_type)
+        except ImportError:
+            continue
+        assert len(dep_file.dependencies) == 7, file_type
+
+
+def test_every_benchmark_runs():
+    names = []
+    for benchmark in suite.collect(sizes=(3,)):
+        try:
+            func = benchmark.setup()
+            func()
+        except ImportError:
+            continue
+        names.append(benchmark.name)
+
+    assert "parse/requirements.txt/3" in names
+    assert "update/RequirementsTXTUpdater/3" in names
+    assert fixtures.requirements_txt(3).count("--hash") == 6
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""Tests for `dparse.cache`"""
+
+from packaging.specifiers import SpecifierSet
+
+from dparse import parse, filetypes
+from dparse.cache import MemoryCache, DirectoryCache, cache_key
+from dparse.dependencies import DependencyFile
+
+
+class CountingParser:
+    calls = 0
+
+    def __init__(self, obj, resolve=False):
+        self.obj = obj
+        self.is_marked_file = False
+
+    def parse(self):
+        CountingParser.calls += 1
+        self.obj.dependencies.append("dependency")
+
+
+def test_memory_cache_skips_parser():
+    cache = MemoryCache()
+    CountingParser.calls = 0
+
+    for _ in range(3):
+        dep_file = parse("django==1.2", parser=CountingParser, cache=cache)
+        assert dep_file.dependencies == ["dependency"]
+        assert dep_file.is_valid
+
+    assert CountingParser.calls == 1
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(maxsize=2)
+    cache.set("a", [1])
+    cache.set("b", [2])
+    assert cache.get("a") == [1]
+    cache.set("c", [3])
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == [1]
+    assert cache.get("c") == [3]
+
+
+def test_cache_key():
+    def key(content, **kwargs):
+        return cache_key(DependencyFile(content, **kwargs))
+
+    base = key("django==1.2", file_type=filetypes.requirements_txt)
+
+    assert base == key("django==1.2", file_type=filetypes.requirements_txt)
+    assert base != key("django==1.3", file_type=filetypes.requirements_txt)
+    assert base != key("django==1.2", file_type=filetypes.tox_ini)
+    assert base != key("django==1.2", file_type=filetypes.requirements_txt,
+                       marker=(("DON'T",), ()))
+    assert key("a", sha="sha", path="req.txt") == \
+        key("b", sha="sha", path="req.txt")
+    # content addressed, the same blob in two checkouts shares an entry
+    assert key("a", sha="sha", path="a/req.txt") == \
+        key("a", sha="sha", path="b/req.txt", resolve=True)
+
+
+def test_directory_cache(tmp_path):
+    cache = DirectoryCache(str(tmp_path / "cache"))
+    content = "django==1.2\nrequests[security]>=2.0"
+
+    dep_file = parse(content, file_type=filetypes.requirements_txt,
+                     cache=cache)
+    cached = parse(content, file_type=filetypes.requirements_txt, cache=cache)
+
+    assert [d.name for d in cached.dependencies] == ["django", "requests"]
+    assert cached.dependencies[0].specs == SpecifierSet("==1.2")
+    assert cached.dependencies[1].extras == ["security"]
+    assert cached.dependencies[0] is not dep_file.dependencies[0]
+
+    cache.clear()
+    assert cache.get(cache_key(cached)) is None
+
+
+def test_directory_cache_keeps_sections(tmp_path):
+    cache = DirectoryCache(str(tmp_path / "cache"))
+    content = '[project]\nname = "x"\ndependencies = ["django"]\n' \
+              '[project.optional-dependencies]\ntest = ["pytest"]\n'
+
+    parse(content, file_type=filetypes.pyproject_toml, cache=cache)
+    cached = parse(content, file_type=filetypes.pyproject_toml, cache=cache)
+
+    assert [(d.name, d.section) for d in cached.dependencies] == \
+        [("django", "dependencies"), ("pytest", "test")]
+
+
+def test_files_with_includes_are_not_cached():
+    cache = MemoryCache()
+    dep_file = parse("-r base.txt\ndjango", path="req.txt", cache=cache)
+
+    assert dep_file.resolved_files
+    assert cache.get(cache_key(dep_file)) is None
+
+
+def test_includes_skipped_without_path_are_not_cached(tmp_path):
+    (tmp_path / "base.txt").write_text("django\n")
+    cache = MemoryCache()
+    content = "-r base.txt\nfoo==1"
+
+    dep_file = parse(content, file_type=filetypes.requirements_txt,
+                     cache=cache)
+    assert dep_file.has_includes and not dep_file.resolved_files
+    assert len(cache) == 0
+
+    dep_file = parse(content, file_type=filetypes.requirements_txt,
+                     path=str(tmp_path / "req.txt"), resolve=True,
+                     cache=cache)
+
+    assert [d.name for d in dep_file.resolved_dependencies] == \
+        ["foo", "django"]
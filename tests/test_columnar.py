@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+"""Tests for `dparse.columnar`"""
+
+import io
+
+import pytest
+
+from dparse import columnar, filetypes, parse
+
+
+def dependency_files():
+    return [
+        parse("django[bcrypt]==1.11 --hash=sha256:abc --hash=sha256:def\n"
+              "requests>=2.0\n",
+              file_type=filetypes.requirements_txt,
+              path="app/requirements.txt"),
+        parse("django==1.11\n", file_type=filetypes.requirements_txt,
+              path="other/requirements.txt"),
+        parse("", file_type=filetypes.requirements_txt,
+              path="empty/requirements.txt"),
+    ]
+
+
+def rows(dep_files):
+    return [
+        (dep_file.path, dep_file.file_type, [
+            (dep.name, dep.spec_string, dep.line, sorted(dep.extras),
+             list(dep.hashes), dep.line_numbers, dep.offsets)
+            for dep in dep_file.dependencies
+        ])
+        for dep_file in dep_files
+    ]
+
+
+def round_trip(dep_files, format):
+    f = io.BytesIO()
+    columnar.dump(dep_files, f, format=format)
+    f.seek(0)
+    return columnar.load(f)
+
+
+def test_to_columns_interns_strings():
+    columns = columnar.to_columns(dependency_files())
+    names = columns["dependencies"]["name"]
+    assert names == ["django", "requests", "django"]
+    assert names[0] is names[2]
+    assert columns["dependencies"]["file_id"] == [0, 0, 1]
+    assert columns["files"]["path"][2] == "empty/requirements.txt"
+
+
+def test_from_columns():
+    dep_files = columnar.from_columns(
+        columnar.to_columns(dependency_files()))
+    assert rows(dep_files) == rows(dependency_files())
+    assert [f.content for f in dep_files] == [None, None, None]
+    assert [f.is_valid for f in dep_files] == [True, True, False]
+
+
+def test_round_trip():
+    expected = rows(dependency_files())
+    for format, module in ((columnar.JSONL, None),
+                           (columnar.MSGPACK, "msgpack"),
+                           (columnar.PARQUET, "pyarrow")):
+        if module is not None:
+            pytest.importorskip(module)
+        assert rows(round_trip(dependency_files(), format)) == expected
+
+
+def test_jsonl_stores_strings_once():
+    f = io.BytesIO()
+    columnar.dump(dependency_files(), f, format=columnar.JSONL)
+    assert f.getvalue().count(b'"django==1.11') == 1
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        columnar.dump(dependency_files(), io.BytesIO(), format="csv")
+
+
+def test_load_checks_version():
+    f = io.BytesIO()
+    columnar.dump(dependency_files(), f, format=columnar.JSONL)
+    data = f.getvalue().replace(
+        b'"version":%d' % columnar.FORMAT_VERSION, b'"version":0', 1)
+    with pytest.raises(ValueError):
+        columnar.load(io.BytesIO(data))
+
+
+def test_to_arrow():
+    pytest.importorskip("pyarrow")
+    table = columnar.to_arrow(dependency_files())
+    assert table.num_rows == 3
+    assert table.column("name").type.value_type == "string"
+    assert table.column("name").to_pylist() == \
+        ["django", "requests", "django"]
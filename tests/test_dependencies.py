@@ -153,3 +153,117 @@ def test_conda_parser_class():
 
     dep_file = parse("", parser=parser.CondaYMLParser)
     assert isinstance(dep_file.parser, parser.CondaYMLParser)    
+
+
+def test_dependency_defaults_are_not_shared():
+    first = Dependency(name="foo", specs=(), line="foo")
+    second = Dependency(name="bar", specs=(), line="bar")
+
+    first.meta["key"] = "value"
+    first.extras.append("security")
+
+    assert second.meta == {}
+    assert second.extras == []
+    assert first.serialize()["extras"] == ["security"]
+
+
+def test_dependency_is_slotted():
+    import pickle
+
+    dep = Dependency(name="Foo_Bar", specs=(), line="Foo_Bar==1.0",
+                     extras=["security"])
+
+    assert not hasattr(dep, "__dict__")
+    with pytest.raises(AttributeError):
+        dep.unknown_attribute = True
+
+    loaded = pickle.loads(pickle.dumps(dep))
+    assert loaded.serialize() == dep.serialize()
+    assert loaded.key == "foo-bar"
+
+
+def test_dependency_file_iter_dependencies_from_file_object(tmp_path):
+    path = tmp_path / "requirements.txt"
+    path.write_text("# DON'T\ndjango==1.2\r\nrequests \\\n  [security]\n")
+
+    with open(str(path)) as f:
+        dep_file = DependencyFile(content=f, path=str(path))
+        dependencies = dep_file.iter_dependencies()
+        first = next(dependencies)
+        assert first.name == "django"
+        assert first.line == "django==1.2"
+        assert dep_file.dependencies == []
+        assert [d.name for d in dependencies] == ["requests"]
+    assert dep_file.is_valid
+
+    with open(str(path)) as f:
+        dep_file = DependencyFile(content=f, path=str(path),
+                                  marker=(("DON'T",), ()))
+        assert list(dep_file.iter_dependencies()) == []
+        assert not dep_file.is_valid
+
+
+def test_dependency_file_iter_dependencies_from_lines():
+    lines = iter(["[packages]\n", 'django = "==2.0"\n'])
+    dep_file = DependencyFile(content=lines, file_type=filetypes.pipfile)
+
+    assert [d.name for d in dep_file.iter_dependencies()] == ["django"]
+
+    lines = iter(["flask\n", "click\n"])
+    dep_file = DependencyFile(content=lines,
+                              file_type=filetypes.requirements_txt).parse()
+
+    assert [d.name for d in dep_file.dependencies] == ["flask", "click"]
+
+
+def test_dependency_specs_are_built_lazily():
+    from packaging.specifiers import SpecifierSet
+
+    dep = Dependency(name="django", specs=">=1.0,<2", line="django>=1.0,<2")
+
+    assert dep.spec_string == ">=1.0,<2"
+    assert isinstance(dep._specs, str)
+
+    assert isinstance(dep.serialize()["specs"], SpecifierSet)
+    assert isinstance(dep.specs, SpecifierSet)
+    assert dep.specs is dep.specs
+    assert dep.specs == SpecifierSet("<2,>=1.0")
+    assert dep.spec_string == str(SpecifierSet("<2,>=1.0"))
+
+    dep.specs = SpecifierSet("==1.2")
+    assert dep.serialize()["specs"] == SpecifierSet("==1.2")
+
+
+def test_dependency_file_json_with_lazy_specs():
+    import json
+
+    content = '[packages]\ndjango = "==2.0"\nflask = "*"\n'
+    dep_file = parse(content, file_type=filetypes.pipfile)
+
+    data = json.loads(dep_file.json())
+    assert [d["specs"] for d in data["dependencies"]] == ["==2.0", ""]
+    # json() writes the specifiers without building SpecifierSets
+    assert all(isinstance(d._specs, str) for d in dep_file.dependencies)
+
+
+def test_dependency_file_write_json(tmp_path):
+    import io
+    import json
+
+    (tmp_path / "base.txt").write_text("flask==1.0\n")
+    content = 'django[bcrypt]==1.11 --hash=sha256:abc\n-r base.txt\n' \
+              'requests>=2.0 # café\n'
+    dep_file = parse(content, file_type=filetypes.requirements_txt,
+                     path=str(tmp_path / "requirements.txt"), resolve=True)
+
+    f = io.StringIO()
+    dep_file.write_json(f)
+    assert json.loads(f.getvalue()) == json.loads(dep_file.json())
+    assert [d["name"] for d in json.loads(f.getvalue())[
+        "resolved_dependencies"]] == ["django", "requests", "flask"]
+
+    f = io.StringIO()
+    dep_file.write_json(f, content=False)
+    data = json.loads(f.getvalue())
+    assert "content" not in data
+    assert data["path"] == dep_file.path
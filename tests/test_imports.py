@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+"""Tests for the modules imported by `dparse`"""
+
+import subprocess
+import sys
+
+# modules only the parsers, parse_many or the asyncio API need
+HEAVY_MODULES = (
+    "packaging", "tomllib", "tomli", "yaml", "configparser", "pathlib",
+    "concurrent", "multiprocessing", "asyncio", "typing", "poetry",
+)
+
+
+def imported_modules(code):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        stderr=subprocess.PIPE, universal_newlines=True, check=True
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def heavy(modules):
+    return sorted(m for m in modules if m.split(".")[0] in HEAVY_MODULES)
+
+
+def test_import_is_lazy():
+    modules = imported_modules("import dparse")
+    assert "dparse.parser" in modules
+    assert heavy(modules) == []
+
+
+def test_pipfile_lock_parsing_is_lazy():
+    modules = imported_modules(
+        "from dparse import parse, filetypes\n"
+        "parse('{\"default\": {\"django\": {\"version\": \"==1.11\", '\n"
+        "      '\"hashes\": []}}}', file_type=filetypes.pipfile_lock)\n"
+    )
+    assert heavy(modules) == []
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""Tests for `dparse.manifest`"""
+
+import os
+
+from dparse import manifest as manifest_module
+from dparse.manifest import Manifest, rescan, diff_dependencies, ADDED, \
+    CHANGED, REMOVED, UNCHANGED
+from dparse.parser import RequirementsTXTLineParser
+
+
+def dep(line):
+    return RequirementsTXTLineParser.parse(line)
+
+
+def test_diff_dependencies():
+    old = [dep("django==1.11"), dep("flask>=1,<2"), dep("celery")]
+    new = [dep("django==2.0"), dep("flask<2,>=1"), dep("requests")]
+    diff = diff_dependencies(old, new)
+    assert [d.name for d in diff.added] == ["requests"]
+    assert [d.name for d in diff.removed] == ["celery"]
+    assert [(o.spec_string, n.spec_string) for o, n in diff.changed] == \
+        [("==1.11", "==2.0")]
+
+
+def statuses(results, root):
+    return {os.path.relpath(r.path, str(root)): r.status for r in results}
+
+
+def test_rescan(tmp_path, monkeypatch):
+    # trust mtimes right away
+    monkeypatch.setattr(manifest_module, "MTIME_SLACK_NS", -10 ** 12)
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "requirements.txt").write_text("django==1.11\nflask\n")
+    (root / "Pipfile").write_text('[packages]\nrequests = "*"\n')
+    (root / "dev-requirements.txt").write_text("pytest\n")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    manifest = Manifest.load(manifest_path)
+    results = list(rescan(root, manifest))
+    assert set(statuses(results, root).values()) == {ADDED}
+    manifest.save()
+
+    calls = []
+    parse_many = manifest_module.parse_many
+
+    def counting_parse_many(files, **kwargs):
+        files = list(files)
+        calls.extend(path for _, path, _ in files)
+        return parse_many(files, **kwargs)
+
+    monkeypatch.setattr(manifest_module, "parse_many", counting_parse_many)
+
+    (root / "requirements.txt").write_text("django==2.0\ncelery\n")
+    os.remove(str(root / "dev-requirements.txt"))
+    manifest = Manifest.load(manifest_path)
+    results = {os.path.relpath(r.path, str(root)): r
+               for r in rescan(root, manifest)}
+    manifest.save()
+
+    assert calls == [str(root / "requirements.txt")]
+    assert {name: r.status for name, r in results.items()} == {
+        "requirements.txt": CHANGED,
+        "Pipfile": UNCHANGED,
+        "dev-requirements.txt": REMOVED,
+    }
+    diff = results["requirements.txt"].diff
+    assert [d.name for d in diff.added] == ["celery"]
+    assert [d.name for d in diff.removed] == ["flask"]
+    assert [(o.spec_string, n.spec_string) for o, n in diff.changed] == \
+        [("==1.11", "==2.0")]
+    assert [d.name for d in results["dev-requirements.txt"].diff.removed] == \
+        ["pytest"]
+    pipfile = results["Pipfile"].dependency_file
+    assert [d.name for d in pipfile.dependencies] == ["requests"]
+    assert pipfile.is_valid
+
+    # touched but identical files are parsed again and reported unchanged
+    del calls[:]
+    os.utime(str(root / "Pipfile"), ns=(0, 0))
+    manifest = Manifest.load(manifest_path)
+    results = list(rescan(root, manifest))
+    assert calls == [str(root / "Pipfile")]
+    assert set(statuses(results, root).values()) == {UNCHANGED}
+
+
+def test_rescan_pyproject_toml_after_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_module, "MTIME_SLACK_NS", -10 ** 12)
+    pyproject = tmp_path / "repo" / "pyproject.toml"
+    pyproject.parent.mkdir()
+    content = '[project]\nname = "x"\ndependencies = [\n' \
+              '    "a==1",\n    "b==1",\n]\n'
+    pyproject.write_text(content)
+    manifest_path = str(tmp_path / "manifest.json")
+
+    manifest = Manifest.load(manifest_path)
+    list(rescan(pyproject.parent, manifest))
+    manifest.save()
+
+    pyproject.write_text(content.replace("b==1", "b==2"))
+    manifest = Manifest.load(manifest_path)
+    [result] = rescan(pyproject.parent, manifest)
+
+    assert result.status == CHANGED
+    assert result.diff.added == result.diff.removed == []
+    assert [(o.spec_string, n.spec_string) for o, n in result.diff.changed] \
+        == [("==1", "==2")]
+
+
+def test_rescan_with_resolve_keeps_includes(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest_module, "MTIME_SLACK_NS", -10 ** 12)
+    root = tmp_path / "repo"
+    root.mkdir()
+    (root / "requirements.txt").write_text(
+        "-r base-requirements.txt\n-r ../shared.txt\nflask\n")
+    (root / "base-requirements.txt").write_text("django\n")
+    # outside the scanned tree
+    (tmp_path / "shared.txt").write_text("celery\n")
+    manifest_path = str(tmp_path / "manifest.json")
+
+    def scan():
+        manifest = Manifest.load(manifest_path)
+        results = {os.path.relpath(r.path, str(root)): r
+                   for r in rescan(root, manifest, resolve=True)}
+        manifest.save()
+        return results
+
+    def resolved(result):
+        return [d.name for d in
+                result.dependency_file.resolved_dependencies]
+
+    first = scan()["requirements.txt"]
+    assert resolved(first) == ["flask", "django", "celery"]
+
+    second = scan()["requirements.txt"]
+    assert second.status == UNCHANGED
+    assert resolved(second) == ["flask", "django", "celery"]
+
+    (tmp_path / "shared.txt").write_text("celery\nredis\n")
+    third = scan()["requirements.txt"]
+    assert third.status == CHANGED
+    assert resolved(third) == ["flask", "django", "celery", "redis"]
+
+
+def test_recent_files_are_parsed_again(tmp_path):
+    (tmp_path / "requirements.txt").write_text("django\n")
+    manifest = Manifest()
+    list(rescan(tmp_path, manifest))
+    # written right before the previous scan, the mtime is not trusted
+    results = list(rescan(tmp_path, manifest))
+    assert [r.status for r in results] == [UNCHANGED]
+    assert results[0].dependency_file.content == "django\n"
+
+
+def test_manifest_from_other_version_is_ignored(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    (tmp_path / "manifest.json").write_text(
+        '{"version": [0, "0.0"], "scanned_at_ns": 1, "entries": {}}')
+    assert Manifest.load(path).scanned_at_ns == 0
+    (tmp_path / "manifest.json").write_text("{broken")
+    assert Manifest.load(path).entries == {}
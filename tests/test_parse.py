@@ -1,16 +1,19 @@
 #!/usr/bin/env python
 
+import codecs
+import configparser
 import sys
 from pathlib import Path, PurePath
 
 import pytest
 
-from dparse.errors import MalformedDependencyFileError
+from dparse.errors import MalformedDependencyFileError, UnknownDependencyFileError
 
 """Tests for `dparse.parser`"""
 
-from dparse.parser import parse, Parser
-from dparse import filetypes
+from dparse.parser import parse, parse_many, parse_path, parse_bytes, \
+    Parser, RequirementsTXTLineParser
+from dparse import filetypes, lexer, parser
 from packaging.specifiers import SpecifierSet
 
 
@@ -209,6 +212,20 @@ def test_is_marked_file():
     assert dep_file.parser.is_marked_file
 
 
+def test_is_marked_file_only_checks_the_first_three_lines():
+    marker = (("DON'T",), ())
+
+    content = "\r\n\nfoo # DON'T\nbar"
+    dep_file = parse(content, file_type=filetypes.requirements_txt,
+                     marker=marker)
+    assert dep_file.parser.is_marked_file
+
+    content = "\r\n\n\nfoo # DON'T\nbar"
+    dep_file = parse(content, file_type=filetypes.requirements_txt,
+                     marker=marker)
+    assert not dep_file.parser.is_marked_file
+
+
 def test_is_marked_line():
 
     content = "foo # don't"
@@ -219,6 +236,27 @@ def test_is_marked_line():
     assert dep_file.parser.is_marked_line(next(dep_file.parser.iter_lines()))
 
 
+def test_setup_cfg():
+    content = "[metadata]\n" \
+              "name = project\n" \
+              "\n" \
+              "[options]\n" \
+              "install_requires =\n" \
+              "    django==1.2\n" \
+              "    requests>=2.0\n" \
+              "\n" \
+              "[options.extras_require]\n" \
+              "test =\n" \
+              "    pytest\n"
+
+    dep_file = parse(content, file_type=filetypes.setup_cfg)
+
+    assert [d.name for d in dep_file.dependencies] == \
+        ["django", "requests", "pytest"]
+    assert dep_file.dependencies[0].specs == SpecifierSet("==1.2")
+    assert dep_file.dependencies[0].dependency_type == filetypes.setup_cfg
+
+
 def test_pipfile():
     content = """[[source]]
 
@@ -309,6 +347,29 @@ def test_pipfile_lock():
     ]
 
 
+def test_pipfile_lock_without_hashes():
+    content = """{
+    "_meta": {},
+    "default": {
+        "django": {
+            "hashes": ["sha256:52475f607c92035d4ac8fee284f56213065a4a6b2"],
+            "version": "==2.0.1"
+        },
+        "vcs-package": {"git": "https://github.com/foo/bar.git"}
+    },
+    "develop": {
+        "pytest": {"hashes": [], "version": "==7.0"}
+    }
+}"""
+    dep_file = parse(content, file_type=filetypes.pipfile_lock,
+                     parser=parser.FastPipfileLockParser)
+
+    assert [d.name for d in dep_file.dependencies] == ["django", "pytest"]
+    assert dep_file.dependencies[0].specs == SpecifierSet("==2.0.1")
+    assert dep_file.dependencies[0].hashes == ()
+    assert dep_file.dependencies[1].sections == ["develop"]
+
+
 def test_pipfile_with_invalid_toml():
     content = """[[source]
 
@@ -337,6 +398,23 @@ def test_pipfile_lock_with_invalid_json():
     assert isinstance(throw, MalformedDependencyFileError)
 
 
+def test_pipfile_lock_with_invalid_version():
+    content = '{"_meta": {}, "default": {"django": ' \
+              '{"hashes": [], "version": "2.0"}}}'
+    with pytest.raises(MalformedDependencyFileError):
+        parse(content, file_type=filetypes.pipfile_lock)
+
+
+def test_pipfile_with_invalid_version():
+    content = '[packages]\ndjango = "2.0"\n'
+    with pytest.raises(MalformedDependencyFileError):
+        parse(content, file_type=filetypes.pipfile)
+
+    dep_file = parse('[packages]\ndjango = ">=1.11, <2"\nflask = "*"\n',
+                     file_type=filetypes.pipfile)
+    assert [d.spec_string for d in dep_file.dependencies] == [">=1.11, <2", ""]
+
+
 def test_poetry_lock_version_lower_than_1_5():
     content = """
     [[package]]
@@ -464,6 +542,117 @@ def test_poetry_lock_version_greater_than_1_5():
     assert dep_file.dependencies[1].hashes == ()
 
 
+def test_poetry_lock_metadata():
+    content = """
+    [[package]]
+    name = "certifi"
+    version = "2022.6.15"
+    description = ""
+    optional = true
+    python-versions = ">=3.6"
+    files = [
+        {file = "certifi-2022.6.15-py3-none-any.whl", hash = "sha256:aaa"},
+        {file = "certifi-2022.6.15.tar.gz", hash = "sha256:bbb"},
+    ]
+
+    [package.source]
+    type = "legacy"
+    url = "https://some.foo/simple"
+    reference = "foo"
+
+    [[package]]
+    name = "attrs"
+    version = "22.1.0"
+    description = ""
+    optional = false
+    python-versions = ">=3.5"
+    files = []
+
+    [metadata]
+    lock-version = "2.0"
+    python-versions = "^3.9"
+    content-hash = "0"
+    """
+
+    certifi, attrs = parse(content, file_type=filetypes.poetry_lock) \
+        .dependencies
+
+    assert certifi.hashes == ("sha256:aaa", "sha256:bbb")
+    assert certifi.meta == {
+        "python-versions": ">=3.6",
+        "optional": True,
+        "source": {"type": "legacy", "url": "https://some.foo/simple",
+                   "reference": "foo"},
+    }
+    assert attrs.hashes == ()
+    assert attrs.meta == {"python-versions": ">=3.5", "optional": False}
+
+    # before 2.0, the files are listed in metadata.files
+    content = """
+    [[package]]
+    name = "certifi"
+    version = "2022.6.15"
+    category = "main"
+    optional = false
+    python-versions = ">=3.6"
+
+    [metadata]
+    lock-version = "1.1"
+    python-versions = "^3.9"
+    content-hash = "0"
+
+    [metadata.files]
+    certifi = [
+        {file = "certifi-2022.6.15.tar.gz", hash = "sha256:ccc"},
+    ]
+    """
+
+    certifi, = parse(content, file_type=filetypes.poetry_lock).dependencies
+    assert certifi.hashes == ("sha256:ccc",)
+    assert certifi.sections == ["main"]
+
+
+def test_poetry_lock_only_uses_poetry_on_request(monkeypatch):
+    import types
+    from dparse.parser import PoetryLockerParser
+
+    calls = []
+
+    class Package:
+        name = "certifi"
+        version = types.SimpleNamespace(text="2022.6.15")
+
+        def to_dependency(self):
+            return types.SimpleNamespace(
+                to_pep_508=lambda: "certifi (==2022.6.15)")
+
+        def dependency_group_names(self):
+            return ["main"]
+
+    class Locker:
+        def __init__(self, path, data):
+            calls.append(str(path))
+
+        def locked_repository(self):
+            return types.SimpleNamespace(packages=[Package()])
+
+    locker = types.ModuleType("poetry.packages.locker")
+    locker.Locker = Locker
+    for name in ("poetry", "poetry.packages"):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, "poetry.packages.locker", locker)
+
+    content = '[[package]]\nname = "attrs"\nversion = "22.1.0"\n'
+    dep_file = parse(content, path="poetry.lock")
+    assert [d.name for d in dep_file.dependencies] == ["attrs"]
+    assert calls == []
+
+    dep_file = parse(content, path="poetry.lock", parser=PoetryLockerParser)
+    assert [d.line for d in dep_file.dependencies] == \
+        ["certifi (==2022.6.15)"]
+    assert calls == ["poetry.lock"]
+
+
 def test_pyproject_toml() -> None:
     content = """
     [project]
@@ -584,3 +773,225 @@ def test_pyproject_toml_no_extra() -> None:
     assert dep_file.dependencies[0].specs == SpecifierSet("")
     assert dep_file.dependencies[0].dependency_type == "pyproject.toml"
     assert dep_file.dependencies[0].section == "dependencies"
+
+
+def test_tokenize_requirements():
+    lines = [
+        "# comment",
+        "-i https://some.foo/",
+        "-r base.txt",
+        "--no-index",
+        "",
+        "alembic==0.8.9 \\",
+        "    --hash=sha256:abcde \\",
+        "    --hash=sha256:fghij",
+        "django",
+    ]
+    tokens = list(lexer.tokenize(lines))
+
+    assert [t.kind for t in tokens] == [
+        lexer.COMMENT, lexer.INDEX_SERVER, lexer.INCLUDE, lexer.OPTION,
+        lexer.REQUIREMENT, lexer.REQUIREMENT
+    ]
+    assert tokens[4].line == "\n".join(lines[5:8])
+    assert tokens[4].parseable_line == \
+        "alembic==0.8.9 --hash=sha256:abcde --hash=sha256:fghij"
+    assert (tokens[4].start, tokens[4].end) == (5, 7)
+    assert (tokens[5].start, tokens[5].end) == (8, 8)
+
+
+def test_option_kind():
+    expected = {
+        "-i https://some.foo/": lexer.INDEX_SERVER,
+        "-ihttps://some.foo/": lexer.INDEX_SERVER,
+        "--index-url=https://some.foo/": lexer.INDEX_SERVER,
+        "--extra-index-url\thttps://some.foo/": lexer.INDEX_SERVER,
+        "-r base.txt": lexer.INCLUDE,
+        "-rbase.txt": lexer.INCLUDE,
+        "--requirement=base.txt": lexer.INCLUDE,
+        "--no-index": lexer.OPTION,
+        "-f https://some.foo/links": lexer.OPTION,
+        "--find-links https://some.foo/links": lexer.OPTION,
+        "-e .": None,
+        "--hash=sha256:abcde": None,
+        "--index": None,
+    }
+    for line, kind in expected.items():
+        assert lexer.option_kind(line) == kind, line
+
+
+def test_parse_hashes():
+    line = "alembic==0.8.9 --hash=sha256:abcde --hash sha512:fghij " \
+           "; python_version > '3.6'"
+    assert Parser.parse_hashes(line) == (
+        "alembic==0.8.9   ; python_version > '3.6'",
+        ["--hash=sha256:abcde", "--hash sha512:fghij"]
+    )
+    assert Parser.parse_hashes(" django ") == ("django", [])
+
+
+def test_requirements_continuation_lines_are_consumed():
+    content = "alembic==0.8.9 \\\n" \
+              "    --hash=sha256:abcde \\\n" \
+              "    --hash=sha256:fghij # yay\n" \
+              "django\n"
+
+    dep_file = parse(content, file_type=filetypes.requirements_txt)
+
+    assert [d.name for d in dep_file.dependencies] == ["alembic", "django"]
+    assert dep_file.dependencies[0].hashes == [
+        "--hash=sha256:abcde", "--hash=sha256:fghij"
+    ]
+    assert dep_file.dependencies[0].line == "alembic==0.8.9 \\\n" \
+                                            "    --hash=sha256:abcde \\\n" \
+                                            "    --hash=sha256:fghij # yay"
+
+
+def test_parse_many():
+    files = [
+        ("django==1.2", "requirements.txt", None),
+        ("{", "Pipfile.lock", None),
+        ("requests", "unknown.file", None),
+        ("flask\nclick", None, filetypes.requirements_txt),
+        ("[tox\nfoo", "tox.ini", filetypes.tox_ini),
+    ]
+
+    for executor in ("thread", "process"):
+        results = list(parse_many(files, executor=executor, max_workers=2,
+                                  ordered=True))
+
+        assert [r.index for r in results] == [0, 1, 2, 3, 4]
+        assert [d.name for d in results[0].dependency_file.dependencies] == \
+            ["django"]
+        assert isinstance(results[1].error, MalformedDependencyFileError)
+        assert isinstance(results[2].error, UnknownDependencyFileError)
+        assert results[2].path == "unknown.file"
+        assert [d.name for d in results[3].dependency_file.dependencies] == \
+            ["flask", "click"]
+        assert isinstance(results[4].error, configparser.Error)
+
+
+def test_parse_many_resolve_on_process_pool(tmp_path):
+    (tmp_path / "base.txt").write_text("django\n")
+    path = str(tmp_path / "requirements.txt")
+    files = [("-r base.txt\nflask\n", path, filetypes.requirements_txt)]
+
+    results = list(parse_many(files, executor="process", max_workers=1,
+                              resolve=True))
+
+    assert results[0].error is None
+    assert [d.name for d in results[0].dependency_file.resolved_dependencies] \
+        == ["flask", "django"]
+
+
+def test_parse_many_unordered_with_shared_executor():
+    from concurrent.futures import ThreadPoolExecutor
+
+    files = [("package-{}==1.0".format(n), None, filetypes.requirements_txt)
+             for n in range(50)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(parse_many(files, executor=executor, chunksize=8))
+
+    assert sorted(r.index for r in results) == list(range(50))
+    for r in results:
+        assert r.dependency_file.dependencies[0].name == \
+            "package-{}".format(r.index)
+
+
+def test_requirement_line_cache():
+    cache_size = RequirementsTXTLineParser.cache_size
+    RequirementsTXTLineParser.set_cache_size(2)
+    try:
+        content = "django==1.2\nrequests\ndjango==1.2\nDjango==1.2"
+        dep_file = parse(content, file_type=filetypes.requirements_txt)
+
+        info = RequirementsTXTLineParser.cache_info()
+        assert (info.hits, info.misses, info.maxsize) == (1, 3, 2)
+        assert info.currsize == 2
+
+        first, _, second, _ = dep_file.dependencies
+        assert first is not second
+        assert first.specs is second.specs
+        first.extras.add("security")
+        assert second.extras == set()
+    finally:
+        RequirementsTXTLineParser.set_cache_size(cache_size)
+
+
+def test_parse_bytes_encodings():
+    content = "django==1.2\nrequests\n"
+
+    for data in (content.encode("utf-8"),
+                 codecs.BOM_UTF8 + content.encode("utf-8"),
+                 content.encode("utf-16"),
+                 memoryview(content.encode("utf-8"))):
+        dep_file = parse_bytes(data, file_type=filetypes.requirements_txt)
+        assert [d.name for d in dep_file.dependencies] == \
+            ["django", "requests"]
+
+    with pytest.raises(MalformedDependencyFileError):
+        parse_bytes(b"django\xff", file_type=filetypes.requirements_txt)
+
+
+def test_parse_path(tmp_path, monkeypatch):
+    path = tmp_path / "Pipfile"
+    path.write_bytes(codecs.BOM_UTF8 + b'[packages]\ndjango = "==2.0"\n')
+
+    dep_file = parse_path(path)
+    assert isinstance(dep_file.parser, parser.PipfileParser)
+    assert dep_file.path == str(path)
+    assert dep_file.dependencies[0].name == "django"
+
+    monkeypatch.setattr(parser, "MMAP_THRESHOLD", 0)
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("-r base.txt\nflask\n")
+    (tmp_path / "base.txt").write_text("click\n", encoding="utf-16")
+
+    dep_file = parse_path(str(requirements), resolve=True)
+    assert [d.name for d in dep_file.resolved_dependencies] == \
+        ["flask", "click"]
+
+
+def test_requirements_offsets_and_line_numbers():
+    content = "-i https://some.foo/\r\n" \
+              "alembic==0.8.9  \\\r\n" \
+              "    --hash=sha256:abcde\r\n" \
+              "\r\n" \
+              "django   # comment\r\n"
+
+    first, second = parse(content, file_type=filetypes.requirements_txt) \
+        .dependencies
+
+    assert first.line_numbers == (1, 2)
+    start, end = first.offsets
+    assert content[start:end] == "alembic==0.8.9  \\\r\n" \
+                                 "    --hash=sha256:abcde"
+    assert second.line_numbers == (4, 4)
+    start, end = second.offsets
+    assert content[start:end] == second.line == "django   # comment"
+
+
+def test_tox_ini_offsets_and_line_numbers():
+    content = "[testenv:bandit]\n" \
+              "deps =\n" \
+              "\tbandit==1.4.0\n" \
+              "[testenv:flake8]\n" \
+              "deps =\n" \
+              "\tbandit==1.4.0\n"
+
+    first, second = parse(content, file_type=filetypes.tox_ini).dependencies
+
+    assert first.line_numbers == (2, 2)
+    assert second.line_numbers == (5, 5)
+    start, end = second.offsets
+    assert content[start:end] == "bandit==1.4.0"
+    assert start == content.rindex("bandit==1.4.0")
+
+
+def test_streamed_requirements_have_no_offsets():
+    dep_file = parse(iter(["django\n", "flask\n"]),
+                     file_type=filetypes.requirements_txt)
+
+    assert dep_file.dependencies[1].line_numbers == (1, 1)
+    assert dep_file.dependencies[1].offsets is None
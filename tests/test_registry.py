@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""Tests for `dparse.registry`"""
+
+import importlib.metadata
+
+import pytest
+
+from dparse import filetypes, parse, registry
+from dparse.parser import RequirementsTXTParser, PipfileLockParser, \
+    Parser
+from dparse.updater import PipfileLockUpdater, ToxINIUpdater
+
+
+@pytest.fixture
+def isolated_registry(monkeypatch):
+    for name in ("_file_types", "_basenames", "_extensions"):
+        monkeypatch.setattr(registry, name, dict(getattr(registry, name)))
+    monkeypatch.setattr(registry, "_suffixes", list(registry._suffixes))
+
+
+def test_detect():
+    expected = {
+        "requirements.txt": filetypes.requirements_txt,
+        "deps/dev.in": filetypes.requirements_txt,
+        "environment.yml": filetypes.conda_yml,
+        "tox.ini": filetypes.tox_ini,
+        "app/Pipfile": filetypes.pipfile,
+        "app/Pipfile.lock": filetypes.pipfile_lock,
+        "setup.cfg": filetypes.setup_cfg,
+        "poetry.lock": filetypes.poetry_lock,
+        "pyproject.toml": filetypes.pyproject_toml,
+        "Cargo.lock": None,
+        "Makefile": None,
+    }
+    for path, file_type in expected.items():
+        assert registry.detect(path) == file_type, path
+
+
+def test_lookups():
+    assert registry.parser_for(path="a/requirements.txt") is \
+        RequirementsTXTParser
+    assert registry.parser_for(filetypes.pipfile_lock) is PipfileLockParser
+    assert registry.updater_for(filetypes.pipfile_lock) is PipfileLockUpdater
+    assert registry.updater_for(path="tox.ini") is ToxINIUpdater
+    assert registry.updater_for(filetypes.poetry_lock) is None
+    assert registry.parser_for("unknown") is None
+    # the file type wins over the path
+    assert registry.parser_for(filetypes.pipfile_lock,
+                               "requirements.txt") is PipfileLockParser
+
+
+class ConstraintsParser(Parser):
+    def parse(self):
+        for line in self.iter_lines():
+            self.obj.dependencies.append(line)
+
+
+def test_register(isolated_registry):
+    registry.register("constraints", ConstraintsParser,
+                      basenames=("CONSTRAINTS",),
+                      suffixes=(".constraints.lst",))
+    assert registry.detect("a/CONSTRAINTS") == "constraints"
+    assert registry.detect("a/prod.constraints.lst") == "constraints"
+    assert registry.detect("a/prod.lst") is None
+
+    dep_file = parse("django\n", path="CONSTRAINTS")
+    assert isinstance(dep_file.parser, ConstraintsParser)
+    assert dep_file.dependencies == ["django"]
+
+
+def test_entry_point_plugins(isolated_registry, monkeypatch):
+    calls = []
+
+    class EntryPoint:
+        def __init__(self, name, plugin):
+            self.name = name
+            self.plugin = plugin
+
+        def load(self):
+            return self.plugin
+
+    def good():
+        calls.append("good")
+        registry.register("plugin", "tests.test_registry:ConstraintsParser",
+                          basenames=("plugin.deps",))
+
+    def broken():
+        raise RuntimeError("boom")
+
+    class EntryPoints(list):
+        def select(self, group):
+            assert group == registry.ENTRY_POINT_GROUP
+            return self
+
+    entry_points = EntryPoints(
+        [EntryPoint("good", good), EntryPoint("broken", broken)])
+    monkeypatch.setattr(importlib.metadata, "entry_points",
+                        lambda: entry_points)
+    monkeypatch.setattr(registry, "_plugins_loaded", False)
+
+    with pytest.warns(UserWarning, match="broken"):
+        assert registry.detect("plugin.deps") == "plugin"
+    assert registry.parser_for("plugin") is ConstraintsParser
+    assert calls == ["good"]
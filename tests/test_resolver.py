@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Tests for `dparse.resolver`"""
+
+import os
+
+from dparse import parse_path
+from dparse.dependencies import DependencyFile
+from dparse.resolver import IncludeResolver
+
+
+def names(dep_file):
+    return [d.name for d in dep_file.resolved_dependencies]
+
+
+def test_shared_includes_are_parsed_once(tmp_path, monkeypatch):
+    (tmp_path / "base.txt").write_text("django\n")
+    (tmp_path / "web.txt").write_text("-r base.txt\nflask\n")
+    (tmp_path / "worker.txt").write_text("-r base.txt\ncelery\n")
+
+    resolver = IncludeResolver()
+    web = parse_path(tmp_path / "web.txt", resolve=True, resolver=resolver)
+    worker = parse_path(tmp_path / "worker.txt", resolve=True,
+                        resolver=resolver)
+
+    assert names(web) == ["flask", "django"]
+    assert names(worker) == ["celery", "django"]
+    assert web.resolved_files[0] is worker.resolved_files[0]
+
+    base = resolver.normalize(str(tmp_path / "base.txt"))
+    assert resolver.graph == {
+        resolver.normalize(str(tmp_path / "web.txt")): [base],
+        resolver.normalize(str(tmp_path / "worker.txt")): [base],
+        base: [],
+    }
+
+
+def test_changed_includes_are_parsed_again(tmp_path):
+    (tmp_path / "common.txt").write_text("requests\n")
+    (tmp_path / "base.txt").write_text("-r common.txt\ndjango\n")
+    (tmp_path / "web.txt").write_text("-r base.txt\n")
+
+    resolver = IncludeResolver()
+    first = parse_path(tmp_path / "web.txt", resolve=True, resolver=resolver)
+    assert names(first) == ["django", "requests"]
+
+    common = tmp_path / "common.txt"
+    common.write_text("requests\nurllib3\n")
+    stat = common.stat()
+    os.utime(str(common), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+    second = parse_path(tmp_path / "web.txt", resolve=True,
+                        resolver=resolver)
+    assert names(second) == ["django", "requests", "urllib3"]
+
+
+def test_include_cycles_are_detected(tmp_path):
+    (tmp_path / "a.txt").write_text("-r b.txt\nflask\n")
+    (tmp_path / "b.txt").write_text("-r a.txt\ndjango\n")
+
+    dep_file = parse_path(tmp_path / "a.txt", resolve=True)
+
+    assert names(dep_file) == ["flask", "django"]
+    b_file = dep_file.resolved_files[0]
+    assert isinstance(b_file, DependencyFile)
+    assert b_file.resolved_files == [str(tmp_path / "a.txt")]
+
+    a, b = (dep_file.resolver.normalize(str(tmp_path / name))
+            for name in ("a.txt", "b.txt"))
+    assert dep_file.resolver.cycles == [(a, b, a)]
+
+
+def test_self_include(tmp_path):
+    (tmp_path / "a.txt").write_text("-r a.txt\nflask\n")
+
+    dep_file = parse_path(tmp_path / "a.txt", resolve=True)
+
+    assert names(dep_file) == ["flask"]
+    assert dep_file.resolved_files == [str(tmp_path / "a.txt")]
+
+
+def test_parallel_resolution_keeps_source_order(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # a tree deeper than the pool is wide
+    (tmp_path / "leaf.txt").write_text("leaf\n")
+    (tmp_path / "middle.txt").write_text("-r leaf.txt\nmiddle\n")
+    for n in range(5):
+        (tmp_path / "child{}.txt".format(n)).write_text(
+            "-r middle.txt\nchild{}\n".format(n))
+    (tmp_path / "top.txt").write_text(
+        "".join("-r child{}.txt\n".format(n) for n in range(5)) +
+        "-r missing.txt\ntop\n")
+
+    for workers in (1, 4):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            resolver = IncludeResolver(executor=executor)
+            dep_file = parse_path(tmp_path / "top.txt", resolve=True,
+                                  resolver=resolver)
+
+        assert [os.path.basename(f.path) for f in
+                dep_file.resolved_files[:5]] == \
+            ["child{}.txt".format(n) for n in range(5)]
+        assert dep_file.resolved_files[5] == str(tmp_path / "missing.txt")
+        assert names(dep_file)[:4] == ["top", "child0", "middle", "leaf"]
+        assert names(dep_file).count("leaf") == 5
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Tests for `dparse.scan`"""
+
+import os
+
+from dparse import filetypes, scan_tree
+from dparse.scan import EXCLUDED_DIRS, classify, walk
+
+
+def test_classify():
+    expected = {
+        "requirements.txt": filetypes.requirements_txt,
+        "dev-requirements.txt": filetypes.requirements_txt,
+        "requirements-test.in": filetypes.requirements_txt,
+        "constraints.txt": filetypes.requirements_txt,
+        os.path.join("requirements", "base.txt"): filetypes.requirements_txt,
+        "tox.ini": filetypes.tox_ini,
+        "setup.cfg": filetypes.setup_cfg,
+        "Pipfile": filetypes.pipfile,
+        "Pipfile.lock": filetypes.pipfile_lock,
+        "poetry.lock": filetypes.poetry_lock,
+        "pyproject.toml": filetypes.pyproject_toml,
+        "environment.yml": filetypes.conda_yml,
+        "conda-dev.yaml": filetypes.conda_yml,
+        "README.txt": None,
+        "docker-compose.yml": None,
+        "pytest.ini": None,
+    }
+    for path, file_type in expected.items():
+        assert classify(path) == file_type, path
+
+
+def make_tree(root):
+    files = {
+        "requirements.txt": "django==1.11\n",
+        "README.txt": "not a requirement\n",
+        "Pipfile": '[packages]\nflask = "*"\n',
+        "svc/requirements/base.txt": "requests\n",
+        "svc/environment.yml": "dependencies:\n  - pip:\n    - celery\n",
+        "svc/tox.ini": "[testenv]\ndeps =\n    pytest\n",
+        ".git/requirements.txt": "skipped\n",
+        "node_modules/pkg/requirements.txt": "skipped\n",
+        ".venv/lib/setup.cfg": "[options]\ninstall_requires = skipped\n",
+        "broken/Pipfile.lock": "{not json",
+    }
+    for name, content in files.items():
+        path = root.joinpath(*name.split("/"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_walk_prunes_excluded_dirs(tmp_path):
+    make_tree(tmp_path)
+    found = [os.path.relpath(path, str(tmp_path)) for path, _ in
+             walk(tmp_path)]
+    assert sorted(found) == sorted([
+        "requirements.txt",
+        "Pipfile",
+        os.path.join("broken", "Pipfile.lock"),
+        os.path.join("svc", "requirements", "base.txt"),
+        os.path.join("svc", "environment.yml"),
+        os.path.join("svc", "tox.ini"),
+    ])
+
+    found = [os.path.relpath(path, str(tmp_path)) for path, _ in
+             walk(tmp_path, exclude=EXCLUDED_DIRS | {"svc", "broken"})]
+    assert sorted(found) == ["Pipfile", "requirements.txt"]
+
+
+def test_scan_tree(tmp_path):
+    make_tree(tmp_path)
+    results = {os.path.relpath(r.path, str(tmp_path)): r
+               for r in scan_tree(tmp_path, max_workers=2)}
+
+    assert len(results) == 6
+    assert results[os.path.join("broken", "Pipfile.lock")].error is not None
+
+    names = {path: [d.name for d in r.dependency_file.dependencies]
+             for path, r in results.items() if r.error is None}
+    assert names == {
+        "requirements.txt": ["django"],
+        "Pipfile": ["flask"],
+        os.path.join("svc", "requirements", "base.txt"): ["requests"],
+        os.path.join("svc", "environment.yml"): ["celery"],
+        os.path.join("svc", "tox.ini"): ["pytest"],
+    }
+
+
+def test_parse_many_reads_files(tmp_path):
+    from dparse import parse_many
+
+    (tmp_path / "requirements.txt").write_text("django\n")
+    results = list(parse_many([
+        (None, str(tmp_path / "requirements.txt"), None),
+        (None, str(tmp_path / "missing.txt"), None),
+    ], ordered=True))
+    assert results[0].dependency_file.dependencies[0].name == "django"
+    assert isinstance(results[1].error, OSError)
@@ -2,10 +2,13 @@
 
 """Tests for `dparse.updater`"""
 
+import json
+
 import pytest
 from dparse.parser import parse
 from dparse.updater import RequirementsTXTUpdater, CondaYMLUpdater, ToxINIUpdater, PipfileLockUpdater, PipfileUpdater
 from dparse import filetypes
+from dparse.dependencies import Dependency
 
 
 def test_update_tox_ini():
@@ -37,6 +40,36 @@ def test_update_tox_ini():
     assert ToxINIUpdater.update(content=content, dependency=dep, version="2.9.5") == new_content
 
 
+def test_update_tox_ini_with_commands_before_deps():
+    content = "[testenv]\n" \
+              "commands = pytest --cov\n" \
+              "deps =\n" \
+              "    pytest\n"
+
+    dep = parse(content, "tox.ini").dependencies[0]
+    assert dep.line_numbers == (3, 3)
+
+    new_content = "[testenv]\n" \
+                  "commands = pytest --cov\n" \
+                  "deps =\n" \
+                  "    pytest==9.9\n"
+    assert ToxINIUpdater.update(content, dep, "9.9") == new_content
+
+
+@pytest.mark.conda
+def test_update_conda_yml_with_comment():
+    content = "name: my_env\n" \
+              "# install requests via pip\n" \
+              "dependencies:\n" \
+              "  - pip:\n" \
+              "    - requests\n"
+
+    dep = parse(content, "conda.yml").dependencies[0]
+    assert dep.line_numbers == (4, 4)
+    assert CondaYMLUpdater.update(content, dep, "2.0") == \
+        content.replace("- requests", "- requests==2.0")
+
+
 @pytest.mark.conda
 def test_update_conda_yml():
     content = "name: my_env\n" \
@@ -436,7 +469,6 @@ def test_update_requirements_unfinished_line():
     assert RequirementsTXTUpdater.update(content=content, version=version,
                                          dependency=dep) == new_content
 
-@pytest.mark.pipenv
 def test_update_pipfile(monkeypatch):
     content = """[[source]]
 
@@ -460,3 +492,173 @@ toml = "*"
     dep = dep_file.dependencies[0]
     new_content = PipfileUpdater.update(content, version="2.1", dependency=dep)
     assert 'django = "==2.1"' in new_content
+
+
+def test_update_many_requirements():
+    content = "raven==0.2\n" \
+              "ravenclient==1.0 # keep me\n" \
+              "alembic==0.8.9 \\\n" \
+              "    --hash=sha256:abcde\n" \
+              "Django\r\n"
+    new_content = "raven==0.3\n" \
+                  "ravenclient>=2.0 # keep me\n" \
+                  "alembic==1.4.2 \\\n" \
+                  "    --hash=sha256:123\n" \
+                  "Django==4.2\r\n"
+
+    raven, ravenclient, alembic, django = parse(
+        content, file_type=filetypes.requirements_txt).dependencies
+    updates = [
+        (raven, "0.3"),
+        (ravenclient, "2.0", ">="),
+        (alembic, "1.4.2", "==", [{"method": "sha256", "hash": "123"}]),
+        (django, "4.2"),
+    ]
+
+    assert RequirementsTXTUpdater.update_many(content, updates) == new_content
+
+    repeated = content
+    for update in updates:
+        repeated = RequirementsTXTUpdater.update(repeated, *update)
+    assert repeated == new_content
+
+    assert RequirementsTXTUpdater.update_many(content, []) == content
+
+
+def test_update_many_tox_ini():
+    content = "[testenv]\n" \
+              "deps =\n" \
+              "\tbandit==1.4.0\n" \
+              "\tflake8==3.0\n"
+    new_content = "[testenv]\n" \
+                  "deps =\n" \
+                  "\tbandit==2.0\n" \
+                  "\tflake8==6.0\n"
+
+    bandit, flake8 = parse(content, filetypes.tox_ini).dependencies
+
+    assert ToxINIUpdater.update_many(
+        content, [(bandit, "2.0"), (flake8, "6.0")]) == new_content
+
+
+def test_update_many_pipfile_lock():
+    content = """{
+    "_meta": {},
+    "default": {
+        "django": {"hashes": ["sha256:abc"], "version": "==2.0.1"},
+        "pytz": {"hashes": ["sha256:def"], "version": "==2017.3"}
+    },
+    "develop": {}
+}"""
+    django, pytz = parse(content, filetypes.pipfile_lock).dependencies
+
+    new_content = PipfileLockUpdater.update_many(content, [
+        (django, "4.2", "==", [{"method": "sha256", "hash": "123"}]),
+        (pytz, "2024.1"),
+    ])
+    data = json.loads(new_content)
+
+    assert data["default"]["django"] == {"hashes": ["sha256:123"],
+                                         "version": "==4.2"}
+    assert data["default"]["pytz"] == {"hashes": [], "version": "==2024.1"}
+
+
+def test_update_requirements_with_hashes_and_crlf():
+    content = "alembic==0.8.9 \\\r\n" \
+              "    --hash=sha256:abcde\r\n" \
+              "django\r\n"
+    new_content = "alembic==1.4.2 \\\n" \
+                  "    --hash=sha256:123\r\n" \
+                  "django\r\n"
+    hashes = [{"method": "sha256", "hash": "123"}]
+
+    dep = parse(content, file_type=filetypes.requirements_txt).dependencies[0]
+
+    assert RequirementsTXTUpdater.update(content, dep, "1.4.2",
+                                         hashes=hashes) == new_content
+
+
+def test_update_requirements_only_touches_the_parsed_line():
+    content = "django==1.0\n" \
+              "-r other.txt\n" \
+              "django==1.0\n"
+    new_content = "django==1.0\n" \
+                  "-r other.txt\n" \
+                  "django==2.0\n"
+
+    second = parse(content, file_type=filetypes.requirements_txt) \
+        .dependencies[1]
+
+    assert RequirementsTXTUpdater.update(content, second, "2.0") == \
+        new_content
+
+
+def test_update_requirements_falls_back_to_regex_on_changed_content():
+    content = "raven==0.2\nflask\n"
+    dep = parse(content, file_type=filetypes.requirements_txt).dependencies[1]
+
+    changed = "# a new comment\n" + content
+
+    assert RequirementsTXTUpdater.update(changed, dep, "3.0") == \
+        "# a new comment\nraven==0.2\nflask==3.0\n"
+
+
+def test_update_pipfile_keeps_formatting():
+    content = """[[source]]
+url = "https://pypi.org/simple"
+name = "pypi"
+
+[packages]
+# the web framework
+django = "==2.0"  # pinned for now
+"flask" = {version = "*", extras = ["async"]}
+requests = {git = "https://github.com/psf/requests.git"}
+
+[dev-packages]
+django = '*'
+
+[requires]
+python_version = "3.11"
+"""
+    new_content = """[[source]]
+url = "https://pypi.org/simple"
+name = "pypi"
+
+[packages]
+# the web framework
+django = "==4.2"  # pinned for now
+"flask" = {version = ">=3.0", extras = ["async"]}
+requests = {git = "https://github.com/psf/requests.git"}
+
+[dev-packages]
+django = "==4.2"
+
+[requires]
+python_version = "3.11"
+"""
+    django = Dependency(name="django", specs="==2.0", line="django==2.0")
+    flask = Dependency(name="flask", specs="", line="flask")
+    requests = Dependency(name="requests", specs="", line="requests")
+    python_version = Dependency(name="python_version", specs="",
+                                line="python_version")
+
+    assert PipfileUpdater.update_many(content, [
+        (django, "4.2"),
+        (flask, "3.0", ">="),
+        (requests, "2.0"),
+        (python_version, "3.12"),
+    ]) == new_content
+
+
+def test_update_pipfile_skips_array_of_tables():
+    content = """[packages]
+name = "==1"
+
+[[source]]
+url = "https://pypi.org/simple"
+name = "pypi"
+"""
+    name = Dependency(name="name", specs="==1", line="name==1")
+
+    assert PipfileUpdater.update(content, name, "2") == \
+        content.replace('name = "==1"', 'name = "==2"')